@@ -1,5 +1,11 @@
 #!/usr/bin/env python
+import os
+import sys
 import bpy
+# the shared audio modules live in the vse folder, which blender -P does not put on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vse"))
+from audio_levels import smooth_envelope
+from audio_features import get_feature_store, band_envelopes
 
 # audio input drives shape key value
 # a Blender Python script by Josh (github.com/Botmasher)
@@ -11,37 +17,49 @@ import bpy
 #   4. choose a scene frame to start playing your audio file below
 #   5. click "Run script" with this script open in the text editor
 #
+# The sound is analysed straight from the .wav file (by audio_levels.py and
+# audio_features.py in the vse folder next to this one) and written into the
+# shape key fcurve, so the script also runs headless:
+#
+#   blender -b scene.blend -P audio_drives_shapekey.py
+#
 
 # audio to use and when to start playing
 sound_file_path = '/Users/username/test.wav'   # path to your file
 custom_key_name = 'audio-shape-key'            # rename your shape key
 starting_frame = 0                             # scene frame to start playback
+attack_seconds = 0.01                          # how fast the key rises with the sound
+release_seconds = 0.2                          # how slowly the key falls back after it
+
+# optionally drive one shape key per frequency band instead, e.g. for lip sync
+# or music visualisers: {'audio-low': (20, 250), 'audio-mid': (250, 2000), 'audio-high': (2000, 8000)}
+band_key_names = {}
 
 class Context_Manager:
     text = "TEXT_EDITOR"
     graph = "GRAPH_EDITOR"
     vse = "SEQUENCE_EDITOR"
     def __init__ (self):
-        return self
+        return None
     def get (self):
-    ''' Read the current context
-    '''
+        ''' Read the current context
+        '''
         return bpy.context.area.type
     def set (self, context):
-    ''' Change the current context
-    '''
+        ''' Change the current context
+        '''
         old_context = bpy.context.area.type
         bpy.context.area.type = context
         return (old_context, context)
     def object (self):
-    ''' Read the active object
-    '''
+        ''' Read the active object
+        '''
         return bpy.context.object
 
 class Audio_Shape_Key:
     def __init__ (self, selected_object, key_name, value=0.0):
-    ''' Create and name a shape key in selected object's data.
-    '''
+        ''' Create and name a shape key in selected object's data.
+        '''
         # add and store shape key
         if selected_object.data.shape_keys == None:
             selected_object.shape_key_add()
@@ -56,66 +74,103 @@ class Audio_Shape_Key:
         # object this key belongs to
         self.object = selected_object
     def set_keyframe (self, frame, value):
-    ''' Keyframe shapekey and store frame:value pair in dictionary
-    '''
+        ''' Keyframe shapekey and store frame:value pair in dictionary
+        '''
         bpy.context.scene.frame_current = frame
         self.key.keyframe_insert ("value", frame = frame)
         self.key.value = value
         self.key.keyframe_insert ("value", frame = frame)
         self.keyframes[frame] = value
     def get_keyframe_value (self, frame):
-    ''' Return the shape key's value at a specific frame
-    '''
+        ''' Return the shape key's value at a specific frame
+        '''
         return self.keyframes [frame]
-    def get_keyframe_curve (self):
-    ''' Return the shape key's fcurve
-    '''
-        # return the keyframe fcurve at this frame
-        if self.object.data.animation_data.action is None:
-            return None
-        for fcurve in self.object.data.animation_data.action.fcurves:
-            # the fcurve's name is the shape key path plus .value
-            if (self.key.name+"\"") in fcurve.data_path:
-                return fcurve
-        return None
+    def get_keyframe_curve (self, create=False):
+        ''' Return the shape key's fcurve, optionally creating it
+        '''
+        # shape key animation lives on the mesh's Key datablock
+        shape_keys = self.object.data.shape_keys
+        if shape_keys.animation_data is None or shape_keys.animation_data.action is None:
+            if not create:
+                return None
+            shape_keys.animation_data_create()
+            shape_keys.animation_data.action = bpy.data.actions.new(shape_keys.name + "Action")
+        # the fcurve's name is the shape key path plus .value
+        data_path = self.key.path_from_id("value")
+        fcurves = shape_keys.animation_data.action.fcurves
+        fcurve = fcurves.find(data_path)
+        if fcurve is None and create:
+            fcurve = fcurves.new(data_path)
+        return fcurve
+    def bake_sound_frames (self, path, frame, attack=0.01, release=0.2, minimum=0.0, maximum=1.0):
+        ''' Key the sound's smoothed per-frame amplitude onto this shape key
+            replacing graph.sound_bake and its envelope modifier
+        '''
+        scene = bpy.context.scene
+        fps = scene.render.fps / scene.render.fps_base
+        # per-frame loudness from the shared feature cache, analysed once per file and fps
+        rms = get_feature_store().features(bpy.path.abspath(path), fps).column('rms')
+        envelope = smooth_envelope(rms, fps, attack=attack, release=release)
+        loudest = envelope.max() if len(envelope) else 0.0
+        envelope = envelope / loudest if loudest > 0 else envelope
+        return self.bake_values(frame, minimum + envelope * (maximum - minimum))
+    def bake_values (self, frame, values):
+        ''' Replace this shape key's keyframes with one value per frame from frame onward
+        '''
+        # start from an empty fcurve so the bake replaces any earlier keys
+        fcurve = self.get_keyframe_curve()
+        if fcurve is not None:
+            self.object.data.shape_keys.animation_data.action.fcurves.remove(fcurve)
+        fcurve = self.get_keyframe_curve(create=True)
+        fcurve.keyframe_points.add(len(values))
+        co = [0.0] * (len(values) * 2)
+        co[0::2] = [float(frame + i) for i in range(len(values))]
+        co[1::2] = values.tolist()
+        fcurve.keyframe_points.foreach_set("co", co)
+        # LINEAR is 1 in the keyframe interpolation enum
+        fcurve.keyframe_points.foreach_set("interpolation", [1] * len(values))
+        fcurve.update()
+        self.keyframes = dict(zip(co[0::2], co[1::2]))
+        self.sound_added = True
+        return fcurve
     def add_sound_to_keyframe (self, path):
-    ''' Bake sound to a keyframe in this shape key
-    '''
+        ''' Bake sound to a keyframe in this shape key
+        '''
         if self.sound_added == False:
             ctx.set ('GRAPH_EDITOR')
             bpy.ops.graph.sound_bake (filepath=path)
             ctx.set ('TEXT_EDITOR')
             self.sound_added = True
     def add_sound_to_sequencer (self, path, frame):
-    ''' Add audio to the sequencer - independent of baking
-    '''
-        ctx.set ('SEQUENCE_EDITOR')
-        bpy.ops.sequencer.sound_strip_add(filepath=sound_file_path)
-        sound_strip = bpy.context.scene.sequence_editor.active_strip
+        ''' Add audio to the sequencer - independent of baking
+        '''
+        scene = bpy.context.scene
+        scene.sequence_editor_create()
+        sound_strip = scene.sequence_editor.sequences.new_sound(name=self.key.name, filepath=path, channel=1, frame_start=frame)
         # set video to length of the audio
-        if bpy.context.scene.frame_start == 1:
-            bpy.context.scene.frame_start = 0
-        if bpy.context.scene.frame_end < sound_strip.frame_final_duration:
-            bpy.context.scene.frame_end = sound_strip.frame_final_duration
-        ctx.set ('TEXT_EDITOR')
+        if scene.frame_start == 1:
+            scene.frame_start = 0
+        if scene.frame_end < sound_strip.frame_final_end:
+            scene.frame_end = sound_strip.frame_final_end
+        return sound_strip
     def add_envelope (self):
-    ''' Add an envelope modifier to the baked sound keyframe's fcurve
-    '''
+        ''' Add an envelope modifier to the baked sound keyframe's fcurve
+        '''
         if self.get_envelope() == None:
             ctx.set ('GRAPH_EDITOR')
             bpy.ops.graph.fmodifier_add(type='ENVELOPE')
             ctx.set ('TEXT_EDITOR')
         return self.get_envelope()
     def get_envelope (self):
-    ''' Return the envelope modifier at this baked sound keyframe's fcurve
-    '''
+        ''' Return the envelope modifier at this baked sound keyframe's fcurve
+        '''
         for modifier in self.get_keyframe_curve().modifiers:
             if modifier.type == "ENVELOPE":
                 return modifier
         return None
     def set_envelope (self, reference, minimum, maximum):
-    ''' Adjust the modifier's value if this shape key has an envelope
-    '''
+        ''' Adjust the modifier's value if this shape key has an envelope
+        '''
         envelope = self.get_envelope()
         if envelope != None:
             envelope.reference_value = reference
@@ -123,31 +178,44 @@ class Audio_Shape_Key:
             envelope.default_max = maximum
         return envelope
     def get_value (self):
-    ''' Read the value of this shape key
-    '''
+        ''' Read the value of this shape key
+        '''
         return self.key.value
     def set_value (self, value):
-    ''' Adjust the value of this shape key
-    '''
+        ''' Adjust the value of this shape key
+        '''
         self.key.value = value
         return self.key.value
 
+def bake_sound_bands (obj, path, frame, key_bands, attack=0.01, release=0.2, minimum=0.0, maximum=1.0):
+    ''' Drive one shape key per frequency band from a single analysis of the sound
+        key_bands maps each shape key name to a (low, high) band in Hz
+    '''
+    scene = bpy.context.scene
+    fps = scene.render.fps / scene.render.fps_base
+    names = list(key_bands.keys())
+    envelopes = band_envelopes(bpy.path.abspath(path), fps, bands=[key_bands[name] for name in names], attack=attack, release=release)
+    audio_keys = []
+    for column, name in enumerate(names):
+        audio_key = Audio_Shape_Key (obj, name, 0.0)
+        audio_key.bake_values (frame, minimum + envelopes[:, column] * (maximum - minimum))
+        audio_keys.append(audio_key)
+    return audio_keys
+
 # get context and the object to key
 ctx = Context_Manager ()
-obj = ctx.object ()
-
-# add shape key
-audio_key = Audio_Shape_Key (obj, custom_key_name, 1.0)
-
-# add keyframe to shape key value
-audio_key.set_keyframe (starting_frame, 1.0)
+obj = bpy.context.scene.objects.active
 
-# bake sound to the shape key fcurve
-audio_key.add_sound_to_keyframe (sound_file_path)
+if band_key_names:
+    # bake each band's smoothed amplitude into its own shape key
+    audio_keys = bake_sound_bands (obj, sound_file_path, starting_frame, band_key_names, attack=attack_seconds, release=release_seconds, minimum=0.0, maximum=0.8)
+    audio_key = audio_keys[0]
+else:
+    # add shape key
+    audio_key = Audio_Shape_Key (obj, custom_key_name, 1.0)
 
-# add envelope to the sound / shape key fcurve
-audio_key.add_envelope ()
-audio_key.set_envelope (0.0, 0.0, 0.8)
+    # bake smoothed sound amplitude straight into the shape key fcurve
+    audio_key.bake_sound_frames (sound_file_path, starting_frame, attack=attack_seconds, release=release_seconds, minimum=0.0, maximum=0.8)
 
 # add same sound at same frame in sequencer
-audio_key.add_sound_to_sequencer (sound_file_path, starting_frame)
\ No newline at end of file
+audio_key.add_sound_to_sequencer (sound_file_path, starting_frame)
@@ -1,11 +1,17 @@
+import time
+import numpy as np
 import bpy
 from bpy.props import *
+from keyframe_writer import write_channels
 
 ## Keyframe Overshooter
 ## script by Joshua R (GitHub user Botmasher)
 ##
 ## Overshoot i% over n frames before settling into a final animated value.
 ##
+## Bulk mode builds start, overshoot and settle keys for many objects as arrays and
+## writes each fcurve once (keyframe_writer.py), without moving the playhead.
+##
 
 # TODO add visual to dopesheet showing which interpolation used by selected kfs
 
@@ -148,6 +154,36 @@ class KeyframeOvershooter():
 
 		return obj.animation_data.action.fcurves
 
+	def overshoot_many(self, objs, attr, target_value, frames=5, overshoot_frames=2, overshoot_percent=1.1, use_distance=True, start_frame=None, interpolation='BEZIER'):
+		"""Keyframe a transform past its target and back for many objects at once
+
+		Arguments:
+		target_value -- one target vector for every object or one per object
+		use_distance -- overshoot by the distance travelled instead of scaling the target
+		interpolation -- interpolation set on every written key
+		"""
+		timer = time.time()
+		objs = [obj for obj in objs if hasattr(obj, attr)]
+		if not objs:
+			return []
+		start_frame = bpy.context.scene.frame_current if start_frame is None else start_frame
+		key_frames = [start_frame, start_frame + frames, start_frame + frames + overshoot_frames]
+
+		# (objects, channels) arrays for every stage
+		start_values = np.array([getattr(obj, attr)[:] for obj in objs], dtype=np.float64)
+		target_values = np.broadcast_to(np.asarray(target_value, dtype=np.float64), start_values.shape)
+		if use_distance:
+			overshoot_values = target_values + (target_values - start_values) * (overshoot_percent - 1)
+		else:
+			overshoot_values = target_values * overshoot_percent
+		# (objects, keys, channels)
+		values = np.stack((start_values, overshoot_values, target_values), axis=1)
+
+		for obj, obj_values in zip(objs, values):
+			write_channels(obj, attr, key_frames, obj_values, interpolation=interpolation, group="Object Transforms")
+		print("keyframe_overshooter - keyed {0} on {1} objects in {2:.4f}s".format(attr, len(objs), time.time() - timer))
+		return objs
+
 kfer = KeyframeOvershooter()
 
 # ui and props
@@ -200,11 +236,20 @@ def handle_overshoot(overshoot_props={}):
 class KfOvershootOperator(bpy.types.Operator):
 	bl_label = "Keyframe Overshooter"
 	bl_idname = "object.keyframe_overshooter"
-	bl_description = "Keyframe transform past target before settling into final value"
+	bl_description = "Keyframe selected objects' transforms past target before settling into final value"
 
 	def execute(self, context):
-		overshoot_props = {prop_name: getattr(scene, prop_group_name, prop_name) for prop_name in prop_names}
-		handle_overshoot(overshoot_props)
+		props = getattr(context.scene, prop_group_name)
+		objs = [obj for obj in context.scene.objects if obj.select]
+		kfer.overshoot_many(
+			objs,
+			props.attr,
+			props.target[:],
+			frames=props.pre_frames,
+			overshoot_frames=props.post_frames,
+			overshoot_percent=props.percent,
+			use_distance=props.use_distance
+		)
 		return {'FINISHED'}
 
 class KfOvershootPanel(bpy.types.Panel):
@@ -224,19 +269,18 @@ class KfOvershootPanel(bpy.types.Panel):
 
 def register():
 	bpy.utils.register_class(KfOvershootProperties)
-	bpy.types.Scene, prop_group_name, bpy.props.PointerProperty(type=KfOvershootProperties)
+	setattr(bpy.types.Scene, prop_group_name, bpy.props.PointerProperty(type=KfOvershootProperties))
 	bpy.utils.register_class(KfOvershootOperator)
 	bpy.utils.register_class(KfOvershootPanel)
 
 def unregister():
 	bpy.utils.unregister_class(KfOvershootPanel)
 	try:
-		props_src = getattr(bpy.context.Scene, prop_group_name)
-		delete(props_src)
+		delattr(bpy.types.Scene, prop_group_name)
 	except:
 		print("Unable to remove kf_overshoot data from bpy.types.Scene")
 	bpy.utils.unregister_class(KfOvershootOperator)
-	bpy.utils.unregister_class(KfOverhootProperties)
+	bpy.utils.unregister_class(KfOvershootProperties)
 
 if __name__ == '__main__':
 	register()
@@ -1,5 +1,7 @@
+import time
+import numpy as np
 import bpy
-from bpy.props import IntProperty
+from bpy.props import IntProperty, BoolProperty
 
 ## Keyframe Shifter
 ##
@@ -8,7 +10,45 @@ from bpy.props import IntProperty
 
 scene = bpy.context.scene
 
-# NOTE basic shift on every keyframe in one obj
+# NOTE basic shift on every keyframe in one obj, or a bulk shift on every keyframe of many
+# objects, their shape keys and materials through flat NumPy arrays
+
+# keyframe point properties shifted along with each key
+keyframe_coords = ('co', 'handle_left', 'handle_right')
+
+def shift_fcurve(fcurve, frameshift, after=None):
+    """Shift an fcurve's keys and handles in time with one foreach_get/set per property
+
+    Only keys at or after the frame `after` move when it is set. Returns keys moved.
+    """
+    count = len(fcurve.keyframe_points)
+    if not count or not frameshift:
+        return 0
+    coords = {}
+    for name in keyframe_coords:
+        coords[name] = np.empty(count * 2, dtype=np.float32)
+        fcurve.keyframe_points.foreach_get(name, coords[name])
+    moving = np.ones(count, dtype=bool) if after is None else coords['co'][0::2] >= after
+    if not moving.any():
+        return 0
+    for name in keyframe_coords:
+        coords[name][0::2][moving] += frameshift
+        fcurve.keyframe_points.foreach_set(name, coords[name])
+    fcurve.update()
+    return int(moving.sum())
+
+def animated_actions(obj):
+    """Actions animating an object, its shape keys and its materials"""
+    owners = [obj]
+    shape_keys = getattr(obj.data, 'shape_keys', None)
+    shape_keys and owners.append(shape_keys)
+    owners += [slot.material for slot in obj.material_slots if slot.material]
+    return [owner.animation_data.action for owner in owners if owner.animation_data and owner.animation_data.action]
+
+def shift_actions(actions, frameshift, after=None):
+    """Shift every fcurve of a list of actions once each, even when actions are shared"""
+    unique = {action.as_pointer(): action for action in actions}
+    return sum(shift_fcurve(fcurve, frameshift, after=after) for action in unique.values() for fcurve in action.fcurves)
 
 class KeyframeShifter:
     def __init__(self):
@@ -55,9 +95,26 @@ class KeyframeShifter:
         self.modified_keyframes[self.current_object] = kfs
         return kfs
 
+    def shift_many(self, objs, frameshift=0, after=None):
+        """Shift keyframes of many objects with their shape keys and materials in one pass"""
+        timer = time.time()
+        actions = [action for obj in objs for action in animated_actions(obj)]
+        shifted = shift_actions(actions, frameshift, after=after)
+        self.shifted_objects = list(objs)
+        print("keyframe_shifter - shifted {0} keys in {1} actions for {2} objects in {3:.4f}s".format(
+            shifted, len(set(action.as_pointer() for action in actions)), len(objs), time.time() - timer
+        ))
+        return shifted
+
 # TODO filter by keyframe attr (like transform, shape, ...)
 kf_shifter = KeyframeShifter()
 
+bpy.types.Scene.keyframe_shifter_after_playhead = BoolProperty(
+    name="After playhead",
+    description="Only shift keyframes at or after the current frame",
+    default=False
+)
+
 bpy.types.Scene.keyframe_shifter_frameshift = IntProperty(
     name="Frameshift",
     description="Frames to shift all keyframes along timeline",
@@ -67,11 +124,15 @@ bpy.types.Scene.keyframe_shifter_frameshift = IntProperty(
 class KfShifterOperator(bpy.types.Operator):
     bl_label = "Keyframe Shifter"
     bl_idname = "object.keyframe_shifter"
-    bl_description = "Move an object's keyframes along timeline"
+    bl_description = "Move selected objects' keyframes along timeline"
 
     def execute(self, ctx):
         frameshift = ctx.scene.keyframe_shifter_frameshift
-        kf_shifter.shift(ctx.scene.objects.active, frameshift=frameshift)
+        after = ctx.scene.frame_current if ctx.scene.keyframe_shifter_after_playhead else None
+        objs = [obj for obj in ctx.scene.objects if obj.select]
+        active = ctx.scene.objects.active
+        active and active not in objs and objs.append(active)
+        kf_shifter.shift_many(objs, frameshift=frameshift, after=after)
         return {'FINISHED'}
 
 class KfShifterPanel(bpy.types.Panel):
@@ -85,6 +146,7 @@ class KfShifterPanel(bpy.types.Panel):
     def draw(self, ctx):
         layout = self.layout
         layout.row().prop(ctx.scene, 'keyframe_shifter_frameshift')
+        layout.row().prop(ctx.scene, 'keyframe_shifter_after_playhead')
         layout.row().operator("object.keyframe_shifter", text="Shift Keyframes")
 
 def register():
@@ -93,7 +155,7 @@ def register():
 
 def unregister():
 	bpy.utils.unregister_class(KfShifterOperator)
-	bpy.utils.unregister_class(KfShifterProperties)
+	bpy.utils.unregister_class(KfShifterPanel)
 
 if __name__ == '__main__':
 	register()
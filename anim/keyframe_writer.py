@@ -0,0 +1,91 @@
+import numpy as np
+import bpy
+
+## Keyframe Writer
+##
+## Blender Python script by Joshua R (GitHub user Botmasher)
+##
+## Write whole fcurves at once: merge new (frame, value) keys with any already on
+## the curve through keyframe_points.add and foreach_set, with no keyframe_insert
+## calls or playhead moves. Existing keys keep their settings.
+
+# keyframe interpolation enum values as stored on keyframes, for foreach_set
+interpolation_ids = {
+    'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2, 'BACK': 3, 'BOUNCE': 4, 'CIRC': 5, 'CUBIC': 6,
+    'ELASTIC': 7, 'EXPO': 8, 'QUAD': 9, 'QUART': 10, 'QUINT': 11, 'SINE': 12
+}
+
+def ensure_action(id_data, name=None):
+    """Get the action animating a datablock, creating animation data and action as needed"""
+    animation_data = id_data.animation_data or id_data.animation_data_create()
+    if not animation_data.action:
+        animation_data.action = bpy.data.actions.new(name or "{0}Action".format(id_data.name))
+    return animation_data.action
+
+def ensure_fcurve(action, data_path, index=0, group=None):
+    """Find or create the fcurve for one property channel"""
+    fcurve = action.fcurves.find(data_path, index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(data_path, index, group) if group else action.fcurves.new(data_path, index)
+    return fcurve
+
+def write_keys(fcurve, frames, values, interpolation='BEZIER'):
+    """Merge keys into an fcurve in one foreach_set per key attribute
+
+    Keys on frames the curve already has a key on replace that key's value in place,
+    moving its handles with it. Other keys are appended after the existing ones and
+    fcurve.update() sorts them, so existing keys keep their handle types, easing,
+    keyframe type and selection and only the new keys get handles and interpolation.
+    Arguments:
+    frames -- key frames
+    values -- key values, one per frame
+    interpolation -- one interpolation for every new key or a list with one per key
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    if isinstance(interpolation, str):
+        modes = np.full(len(frames), interpolation_ids[interpolation], dtype=np.int32)
+    else:
+        modes = np.array([interpolation_ids[mode] for mode in interpolation], dtype=np.int32)
+    # the last key given for a frame wins
+    unique_frames, last_reversed = np.unique(frames[::-1], return_index=True)
+    keep = len(frames) - 1 - last_reversed
+    frames, values, modes = unique_frames, values[keep], modes[keep]
+
+    points = fcurve.keyframe_points
+    existing_count = len(points)
+    arrays = {}
+    for attr, size, dtype in (('co', 2, np.float32), ('handle_left', 2, np.float32), ('handle_right', 2, np.float32), ('interpolation', 1, np.int32)):
+        arrays[attr] = np.empty(existing_count * size, dtype=dtype)
+        existing_count and points.foreach_get(attr, arrays[attr])
+    existing = {frame: i for i, frame in enumerate(arrays['co'][0::2].tolist())}
+    found = np.array([frame in existing for frame in frames.tolist()], dtype=bool)
+
+    # replace values on existing frames, shifting their handles by the same amount
+    replaced = np.array([existing[frame] for frame in frames[found].tolist()], dtype=np.int64)
+    shift = values[found] - arrays['co'][replaced * 2 + 1]
+    arrays['co'][replaced * 2 + 1] = values[found]
+    arrays['handle_left'][replaced * 2 + 1] += shift
+    arrays['handle_right'][replaced * 2 + 1] += shift
+    arrays['interpolation'][replaced] = modes[found]
+
+    # append the rest with handles on the key so update() computes them fresh
+    added = np.column_stack((frames[~found], values[~found])).ravel()
+    points.add(len(added) // 2)
+    co = np.concatenate((arrays['co'], added))
+    points.foreach_set('co', co)
+    points.foreach_set('handle_left', np.concatenate((arrays['handle_left'], added)))
+    points.foreach_set('handle_right', np.concatenate((arrays['handle_right'], added)))
+    points.foreach_set('interpolation', np.concatenate((arrays['interpolation'], modes[~found])))
+    # sort points and recalculate handles
+    fcurve.update()
+    return fcurve
+
+def write_channels(id_data, data_path, frames, values, interpolation='BEZIER', group=None):
+    """Write keys for every index of a vector property, with values shaped (keys, channels)"""
+    action = ensure_action(id_data)
+    values = np.asarray(values, dtype=np.float32)
+    return [
+        write_keys(ensure_fcurve(action, data_path, index, group=group), frames, values[:, index], interpolation=interpolation)
+        for index in range(values.shape[1])
+    ]
@@ -1,5 +1,8 @@
+import time
+import numpy as np
 import bpy
 import bpy.props
+from keyframe_writer import write_channels
 
 ## Object Popin-Popout Effect
 ##
@@ -11,6 +14,10 @@ import bpy.props
 ## 3) rebound to final size
 ## An option for reversing this sequence allows you to make a popout animation.
 ##
+## popin_many staggers the effect across many objects, ordered by selection, distance
+## from the 3D cursor or a random seed. All scale keys are computed up front and
+## written straight into each object's action, without stepping the playhead.
+##
 
 def keyframe_prop(obj, prop_name='', prop_val=None, frame=None):
     """Keyframe a property on object at this frame"""
@@ -40,6 +47,56 @@ def popin(obj, start_frame=1, scale_frames=0, rebound_frames=0, overshoot_factor
     keyframe_prop(obj, prop_name='scale', prop_val=obj_size, frame=bpy.context.scene.frame_current)
     return obj
 
+def cursor_location(scene=None):
+    """3D cursor location in Blender 2.79 or 2.8"""
+    scene = bpy.context.scene if scene is None else scene
+    return scene.cursor.location if hasattr(scene, 'cursor') else scene.cursor_location
+
+def order_objects(objs, order='SELECTION', origin=None, seed=0):
+    """Sort objects for a staggered popin
+
+    Arguments:
+    order -- 'SELECTION' keeps the given order, 'CURSOR' starts nearest origin, 'RANDOM' shuffles
+    origin -- location distances are measured from, defaulting to the 3D cursor
+    seed -- random seed, so a shuffled order can be repeated
+    """
+    objs = list(objs)
+    if order == 'CURSOR' and objs:
+        origin = cursor_location() if origin is None else origin
+        locations = np.array([obj.matrix_world.translation[:] for obj in objs])
+        distances = np.linalg.norm(locations - np.array(origin[:]), axis=1)
+        return [objs[i] for i in np.argsort(distances, kind='mergesort')]
+    if order == 'RANDOM':
+        return [objs[i] for i in np.random.RandomState(seed).permutation(len(objs))]
+    return objs
+
+def popin_keys(full_sizes, start_frames, scale_frames=0, rebound_frames=0, overshoot_factor=1.0, tiny_size=(0,0,0), reverse=False):
+    """Compute popin key frames shaped (objects, keys) and scales shaped (objects, keys, axes)"""
+    full_sizes = np.asarray(full_sizes, dtype=np.float64)
+    tiny_sizes = np.broadcast_to(np.asarray(tiny_size, dtype=np.float64), full_sizes.shape)
+    overshoot_sizes = full_sizes * overshoot_factor
+    first_frames, second_frames = (rebound_frames, scale_frames) if reverse else (scale_frames, rebound_frames)
+    frames = np.asarray(start_frames, dtype=np.float64)[:, None] + np.array([0, first_frames, first_frames + second_frames])
+    stages = (full_sizes, overshoot_sizes, tiny_sizes) if reverse else (tiny_sizes, overshoot_sizes, full_sizes)
+    return frames, np.stack(stages, axis=1)
+
+def popin_many(objs, start_frame=1, stagger=0, scale_frames=0, rebound_frames=0, overshoot_factor=1.0, tiny_size=(0,0,0), reverse=False, order='SELECTION', origin=None, seed=0):
+    """Animate staggered popin or popout effects on many objects in one pass
+
+    Each object starts stagger frames after the one before it in the chosen order.
+    """
+    timer = time.time()
+    objs = order_objects([obj for obj in objs if hasattr(obj, 'scale')], order=order, origin=origin, seed=seed)
+    if not objs:
+        return []
+    full_sizes = np.array([obj.scale[:] for obj in objs])
+    start_frames = start_frame + np.arange(len(objs)) * stagger
+    frames, values = popin_keys(full_sizes, start_frames, scale_frames=scale_frames, rebound_frames=rebound_frames, overshoot_factor=overshoot_factor, tiny_size=tiny_size, reverse=reverse)
+    for obj, obj_frames, obj_values in zip(objs, frames, values):
+        write_channels(obj, 'scale', obj_frames, obj_values, group="Object Transforms")
+    print("popin_object - keyed {0} objects in {1:.4f}s".format(len(objs), time.time() - timer))
+    return objs
+
 # UI menu properties
 def setup_ui_props():
     Scene = bpy.types.Scene
@@ -47,6 +104,18 @@ def setup_ui_props():
     Scene.popin_frames_rebound = bpy.props.IntProperty(name="Rebound Frames", description="How long it takes object to settle after popin", default=2)
     Scene.popin_strength = bpy.props.FloatProperty(name="Strength", description="How much to overshoot object scale on popin", default=1.1)
     Scene.popin_reverse = bpy.props.BoolProperty(name="Reverse", description="Keyframe as scale-down popout instead", default=0)
+    Scene.popin_stagger = bpy.props.IntProperty(name="Stagger", description="Frames between each selected object starting its popin", default=0, min=0)
+    Scene.popin_order = bpy.props.EnumProperty(
+        name="Order",
+        description="Order selected objects pop in",
+        items=[
+            ('SELECTION', "Selection", "Active object first, then the rest of the selection"),
+            ('CURSOR', "Cursor Distance", "Objects nearest the 3D cursor first"),
+            ('RANDOM', "Random", "Shuffle objects using the seed")
+        ],
+        default='SELECTION'
+    )
+    Scene.popin_seed = bpy.props.IntProperty(name="Seed", description="Random order seed", default=0, min=0)
     return
 
 setup_ui_props()
@@ -62,30 +131,42 @@ class PopinPanel (bpy.types.Panel):
     bl_region_type = "TOOLS"
     def draw (self, context):
         scene = bpy.context.scene
-        rows = [self.layout.row() for i in range(5)]
+        rows = [self.layout.row() for i in range(8)]
         # config interface
         rows[0].prop(scene, "popin_frames_scale")
         rows[1].prop(scene, "popin_frames_rebound")
         rows[2].prop(scene, "popin_strength")
         rows[3].prop(scene, "popin_reverse")
-        pop_txt = "Popin Object" if not scene.popin_reverse else "Popout Object"
-        props = rows[4].operator("object.popin_effect", text=pop_txt)
+        rows[4].prop(scene, "popin_stagger")
+        rows[5].prop(scene, "popin_order")
+        rows[6].prop(scene, "popin_seed")
+        pop_txt = "Popin Objects" if not scene.popin_reverse else "Popout Objects"
+        props = rows[7].operator("object.popin_effect", text=pop_txt)
         return
 
 class PopinOperator (bpy.types.Operator):
     bl_label = "Popin-Popout Operator"
     bl_idname = "object.popin_effect"
-    bl_description = "Add a customized scale pop-in animation to the 3D object"
+    bl_description = "Add a customized scale pop-in animation to the selected 3D objects"
 
     def execute (self, context):
         scene = bpy.context.scene
-        obj = bpy.context.scene.objects.active
-        frame = bpy.context.scene.frame_current
-        if hasattr(obj, 'scale') and hasattr(obj, 'animation_data'):
-            popin(obj, start_frame=frame, scale_frames=scene.popin_frames_scale, rebound_frames=scene.popin_frames_rebound, overshoot_factor=scene.popin_strength, reverse=scene.popin_reverse)
-            bpy.context.scene.frame_current = frame
-        #else:
-        #    print("Current object does not support Popin-Popout animations")
+        active = scene.objects.active
+        # active object first, then the rest of the selection
+        objs = [obj for obj in (active,) if obj and obj.select] + [obj for obj in scene.objects if obj.select and obj != active]
+        objs = objs or [active]
+        objs = [obj for obj in objs if hasattr(obj, 'scale') and hasattr(obj, 'animation_data')]
+        popin_many(
+            objs,
+            start_frame=scene.frame_current,
+            stagger=scene.popin_stagger,
+            scale_frames=scene.popin_frames_scale,
+            rebound_frames=scene.popin_frames_rebound,
+            overshoot_factor=scene.popin_strength,
+            reverse=scene.popin_reverse,
+            order=scene.popin_order,
+            seed=scene.popin_seed
+        )
         return {'FINISHED'}
 
 def register():
@@ -1,16 +1,21 @@
 import bpy
 from collections import deque
 import selection_utils
+from popin_object import popin_many
 
 ## Popin-Popout Objects Sequentially
 ##
 ## Handler for executing popin_object across multiple objects
 ## and staggering the effects
 ## Example use: popin multiple image planes one after another
+##
+## Keys are computed for every object at once and written into their actions by
+## popin_object.popin_many, so the playhead does not step through each stage.
 
 ## currently works
 
-# TODO: popin objects by selection order
+# NOTE: Blender does not keep selection order, so the order set on OrderedSelection
+# is used, or objects can be ordered by distance from the cursor or a random seed
 # proposed ways of preserving order:
 # https://blenderartists.org/t/how-to-get-selection-order/635194/8
 
@@ -130,27 +135,22 @@ class OrderedSelection:
 selection = OrderedSelection()
 selection.set(bpy.context.selected_objects)
 
-def popin_sequential(frame_gap=0):
-
+def popin_sequential(frame_gap=0, scale_frames=4, rebound_frames=2, overshoot_factor=1.1, order='SELECTION', seed=0):
+    """Popin the ordered selection one after another, frame_gap frames apart"""
     objs = selection.get()
 
     if not objs:
         return
 
-    playhead = Playhead()
-
-    deactivate_all()
-
-    for obj in objs:
-        set_active(obj)
-
-        popin(obj)
-
-        unset_active()
-        obj != objs[len(objs)-1] and frame_gap and playhead.forward(frame_gap)
-
-    set_selected(objs)
-
-    return objs
+    return popin_many(
+        objs,
+        start_frame=Playhead().get(),
+        stagger=scale_frames + rebound_frames + frame_gap,
+        scale_frames=scale_frames,
+        rebound_frames=rebound_frames,
+        overshoot_factor=overshoot_factor,
+        order=order,
+        seed=seed
+    )
 
 popin_sequential(frame_gap=2)
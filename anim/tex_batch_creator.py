@@ -1,6 +1,11 @@
+import os
+import sys
 import bpy
 from bpy.props import *
 from bpy_extras.io_utils import ImportHelper    # help with file browser
+# the shared image index lives in the vse folder, which blender -P does not put on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vse"))
+from image_index import get_image_index        # image sizes without loading
 
 # Take image paths and create textures to fill object's material slots
 class ImgTexturizer:
@@ -11,21 +16,29 @@ class ImgTexturizer:
         self.material = None    # assign in setup
 
     def create_img_plane (self, transparent):
-        old_area = bpy.context.area.type
-        bpy.context.area.type = 'VIEW_3D'
-        # add 0th image as plane
-        bpy.ops.import_image.to_plane(files=[{'name': self.texture_names[0]}],directory=self.dir)
-        # set 0th image's texture properties
-        obj = bpy.context.scene.objects.active
-        bpy.context.area.type = old_area
-        if transparent:
-            # set alpha on image
-            obj.active_material.active_texture.image.use_alpha = True
-            obj.active_material.active_texture.use_preview_alpha = True
-            obj.active_material.texture_slots[0].use_map_alpha = True
-        obj.active_material.active_texture.extension = 'CLIP'
+        # size a plane 1 unit tall to the 0th image's aspect read from the image index
+        # instead of importing it as a plane through the 3D view
+        info = get_image_index().info(self.build_path(self.texture_names[0]))
+        aspect = info['width'] / info['height'] if info and info['height'] else 1.0
+        name = self.strip_img_extension(self.texture_names[0])
+        mesh = bpy.data.meshes.new(name)
+        mesh.from_pydata([(-aspect/2, -0.5, 0), (aspect/2, -0.5, 0), (aspect/2, 0.5, 0), (-aspect/2, 0.5, 0)], [], [(0, 1, 2, 3)])
+        mesh.uv_textures.new()
+        for loop, uv in zip(mesh.uv_layers.active.data, [(0, 0), (1, 0), (1, 1), (0, 1)]):
+            loop.uv = uv
+        mesh.update()
+        obj = bpy.data.objects.new(name, mesh)
+        scene = bpy.context.scene
+        scene.objects.link(obj)
+        obj.location = scene.cursor_location
+        scene.objects.active = obj
+        # add 0th image as the material's first texture
+        self.material = bpy.data.materials.new(name)
+        mesh.materials.append(self.material)
+        self.fill_tex_slot(0, 0, [], transparent)
+        self.material.texture_slots[0].texture_coords = 'UV'
         # update the reference material
-        return obj.active_material
+        return self.material
 
     def setup (self, overwrite_slots, update_existing, use_transparency):        
         # track created imgs (array) and number of tex slots filled (counter)
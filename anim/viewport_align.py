@@ -1,13 +1,18 @@
+import hashlib
 import bpy
-from mathutils import Matrix
+import bmesh
+import numpy as np
+from mathutils import Matrix, Vector
 import bpy_extras
 
 ## Align Object in Camera Viewport
 ##
 ## Blender Python script by Josh R (GitHub user Botmasher)
 
-# /!\ Caution - current implementation slows with vertex count
-# /!\ (may loop over vertices multiple times)
+# Vertex extremes in camera view are found with NumPy: coordinates are read in one
+# foreach_get and projected through a single world to camera view matrix that
+# reproduces bpy_extras.object_utils.world_to_camera_view. Very dense meshes are
+# first reduced to their convex hull, which holds every extreme point.
 
 # Base implementation
 # - determine point at center of camera x,y
@@ -110,33 +115,118 @@ def is_alignable(scene=bpy.context.scene):
         return False
     return True
 
-def get_edge_vertices_uv_xy(obj=None, cam=None):
+# meshes with at least this many vertices are reduced to their convex hull
+hull_min_vertices = 50000
+
+# mesh name -> (hash of its vertex coordinates, hull vertex coordinates)
+hull_cache = {}
+
+def matrix_to_array(matrix):
+    """Copy a mathutils Matrix into a NumPy array"""
+    return np.array([list(row) for row in matrix], dtype=np.float64)
+
+def camera_view_matrix(cam, scene=bpy.context.scene):
+    """Build one 4x4 taking world coordinates to camera view (u, v) before the perspective divide
+
+    Applying it gives (u * z, v * z, z, z) for perspective cameras and (u, v, z, 1) for
+    orthographic ones, where z is the depth in front of the camera. Follows the
+    frame math in bpy_extras.object_utils.world_to_camera_view.
+    """
+    frame = [-v for v in cam.data.view_frame(scene=scene)[:3]]
+    min_x, max_x = frame[1].x, frame[2].x
+    min_y, max_y = frame[0].y, frame[1].y
+    width = max_x - min_x
+    height = max_y - min_y
+    if cam.data.type != 'ORTHO':
+        # frame corners scale with depth, so divide through by z afterwards
+        depth = frame[0].z
+        projection = np.array([
+            [depth / width, 0.0, min_x / width, 0.0],
+            [0.0, depth / height, min_y / height, 0.0],
+            [0.0, 0.0, -1.0, 0.0],
+            [0.0, 0.0, -1.0, 0.0]
+        ])
+    else:
+        projection = np.array([
+            [1.0 / width, 0.0, 0.0, -min_x / width],
+            [0.0, 1.0 / height, 0.0, -min_y / height],
+            [0.0, 0.0, -1.0, 0.0],
+            [0.0, 0.0, 0.0, 1.0]
+        ])
+    return projection.dot(matrix_to_array(cam.matrix_world.normalized().inverted()))
+
+def project_points(points, matrix):
+    """Project (n, 3) coordinates through a camera view matrix to (n, 3) u, v, depth"""
+    projected = points.dot(matrix[:3, :3].T) + matrix[:3, 3]
+    w = points.dot(matrix[3, :3]) + matrix[3, 3]
+    # world_to_camera_view puts points level with the camera at the frame center
+    level = w == 0.0
+    w[level] = 1.0
+    uv = projected[:, :2] / w[:, None]
+    uv[level] = 0.5
+    return np.column_stack((uv, projected[:, 2]))
+
+def mesh_coordinates(mesh):
+    """Read every vertex coordinate of a mesh into an (n, 3) array in one call"""
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get('co', coordinates)
+    return coordinates.reshape(-1, 3)
+
+def hull_coordinates(mesh):
+    """Coordinates of the mesh vertices on its convex hull, cached until the mesh geometry changes
+
+    Falls back to every vertex when the hull comes back empty or degenerate, as it can
+    for flat (coplanar) meshes.
+    """
+    coordinates = mesh_coordinates(mesh)
+    geometry_hash = hashlib.sha1(coordinates.tobytes()).hexdigest()
+    cached = hull_cache.get(mesh.name)
+    if cached is not None and cached[0] == geometry_hash:
+        return cached[1]
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    hull = bmesh.ops.convex_hull(bm, input=bm.verts, use_existing_faces=False)
+    hull_verts = [geom for geom in hull['geom'] if isinstance(geom, bmesh.types.BMVert)]
+    points = np.array([v.co[:] for v in hull_verts], dtype=np.float64).reshape(-1, 3)
+    bm.free()
+    if len(points) < 4:
+        points = coordinates
+    # one entry per existing mesh, replaced whenever its geometry changes
+    for name in [name for name in hull_cache if name not in bpy.data.meshes]:
+        del hull_cache[name]
+    hull_cache[mesh.name] = (geometry_hash, points)
+    return points
+
+def extreme_coordinates(obj, use_hull=None):
+    """Local coordinates that can hold the object's camera view extremes
+
+    The camera view projection keeps extremes on the convex hull for points in front of
+    the camera, so dense meshes are cut down to their hull (set use_hull to force it).
+    """
+    mesh = obj.data
+    use_hull = len(mesh.vertices) >= hull_min_vertices if use_hull is None else use_hull
+    return hull_coordinates(mesh) if use_hull else mesh_coordinates(mesh)
+
+def get_edge_vertices_uv_xy(obj=None, cam=None, use_hull=None):
     """Find the rightmost, leftmost, topmost and bottommost vertex in camera view
     Return render UV and the world XY coordinates for these extremes
     """
-    if not is_alignable():
+    if obj is None or cam is None:
+        if not is_alignable():
+            return
+        obj, cam = get_active_alignables()
+    if not has_mesh(obj) or not is_camera(cam) or len(obj.data.vertices) < 1:
         return
-    obj, cam = get_active_alignables()
-    edges = {'u': [None, None], 'v': [None, None], 'x': [None, None], 'y': [None, None]}
-    for v in obj.data.vertices:
-        v_uv = get_frustum_loc(obj.matrix_world * v.co, cam=cam)
-        # TODO add vertex to edges if it is more positive or negative than stored extreme edges
-        # zeroth value for L/bottom of render screen, first value for R/top render screen
-        edge_units = [['u', 'x'], ['v', 'y']]
-        for i in range(2):
-            uv, xy = edge_units[i]
-            print("Vertex %s coords:" % uv.upper())
-            v_uv and print(v_uv[i])
-            print("Vertex %s coords:" % xy.upper())
-            v.co and print((obj.matrix_world * v.co)[i])
-            if edges[uv][0] is None or v_uv[i] < edges[uv][0]:
-                edges[uv][0] = v_uv[i]
-                edges[xy][0] = (obj.matrix_world * v.co)[i]
-            if edges[uv][1] is None or v_uv[i] > edges[uv][1]:
-                edges[uv][1] = v_uv[i]
-                edges[xy][1] = (obj.matrix_world * v.co)[i]
-    print("\n\nUV Extreme Edges:")
-    print(edges)
+    points = extreme_coordinates(obj, use_hull=use_hull)
+    world = matrix_to_array(obj.matrix_world)
+    uvz = project_points(points, camera_view_matrix(cam).dot(world))
+    # zeroth value for L/bottom of render screen, first value for R/top render screen
+    edges = {}
+    for i, (uv, xy) in enumerate((('u', 'x'), ('v', 'y'))):
+        low, high = uvz[:, i].argmin(), uvz[:, i].argmax()
+        world_low, world_high = (points[[low, high]].dot(world[:3, :3].T) + world[:3, 3])[:, i]
+        edges[uv] = [float(uvz[low, i]), float(uvz[high, i])]
+        edges[xy] = [float(world_low), float(world_high)]
     return edges
 
 def is_clamped(r=[], r_min=0.0, r_max=1.0):
@@ -339,13 +429,121 @@ def move_vertex_to_cam(vert_data, obj, cam):
     move_obj(obj, x=dist_x, y=dist_y)
     return vert_data
 
+# object types without geometry to frame
+unframed_types = ('CAMERA', 'LAMP', 'EMPTY', 'SPEAKER')
+
+def camera_view_bounds(objs, cam, scene=bpy.context.scene):
+    """Project every object's bounding box into camera view in one pass
+
+    Returns an (n, 4) array of u min, u max, v min, v max and an (n,) array of the
+    nearest corner depth. Box corners bound the geometry, so these bounds can only
+    be wider than the vertices' own.
+    """
+    corners = np.array([[corner[:] for corner in obj.bound_box] for obj in objs], dtype=np.float64)
+    corners = np.concatenate((corners, np.ones(corners.shape[:2] + (1,))), axis=2)
+    worlds = np.array([matrix_to_array(obj.matrix_world) for obj in objs])
+    view = np.einsum('ij,njk->nik', camera_view_matrix(cam, scene=scene), worlds)
+    projected = np.einsum('nij,nkj->nki', view, corners)
+    w = projected[:, :, 3]
+    in_front = w > 0.0
+    w = np.where(in_front, w, 1.0)
+    u = projected[:, :, 0] / w
+    v = projected[:, :, 1] / w
+    bounds = np.stack((u.min(axis=1), u.max(axis=1), v.min(axis=1), v.max(axis=1)), axis=1)
+    depth = np.where(in_front, projected[:, :, 2], -np.inf).min(axis=1)
+    return (bounds, depth)
+
+def vertex_view_bounds(obj, cam, scene=bpy.context.scene):
+    """Exact u min, u max, v min, v max of a mesh's vertices in front of the camera"""
+    view = camera_view_matrix(cam, scene=scene).dot(matrix_to_array(obj.matrix_world))
+    uvz = project_points(extreme_coordinates(obj), view)
+    uvz = uvz[uvz[:, 2] > 0.0]
+    if not len(uvz):
+        return None
+    return np.array([uvz[:, 0].min(), uvz[:, 0].max(), uvz[:, 1].min(), uvz[:, 1].max()])
+
+def solve_fit(bounds, pivot, margin=0.05, scale_up=False):
+    """Solve the scale about the pivot and the UV shift that fit view bounds inside the frame"""
+    room = 1.0 - 2.0 * margin
+    width = bounds[1] - bounds[0]
+    height = bounds[3] - bounds[2]
+    scale = min(room / width if width > 0 else 1.0, room / height if height > 0 else 1.0)
+    scale = scale if scale_up else min(scale, 1.0)
+    # scaling about the pivot scales its view bounds about the pivot's own view location
+    scaled = np.array([pivot[0], pivot[0], pivot[1], pivot[1]]) + (bounds - np.array([pivot[0], pivot[0], pivot[1], pivot[1]])) * scale
+    shift = []
+    for low, high in ((scaled[0], scaled[1]), (scaled[2], scaled[3])):
+        if low < margin:
+            shift.append(margin - low)
+        elif high > 1.0 - margin:
+            shift.append(1.0 - margin - high)
+        else:
+            shift.append(0.0)
+    return (scale, shift)
+
+def fit_objects_to_frame(objs=None, cam=None, margin=0.05, scale_up=False, scene=bpy.context.scene):
+    """Scale and move many objects so each fits inside the camera's render frame
+
+    Bounding boxes are projected for the whole selection at once and, unless scale_up
+    is set, only objects whose boxes leave the frame have their mesh vertices checked.
+    Each object is scaled about its origin and moved parallel to the view, and every
+    transform is written together at the end.
+    """
+    cam = scene.camera if cam is None else cam
+    objs = [obj for obj in (scene.objects if objs is None else objs) if (objs is not None or obj.select) and obj.type not in unframed_types and obj != cam]
+    if not objs or not is_camera(cam):
+        return []
+    view_matrix = camera_view_matrix(cam, scene=scene)
+    frame = [-v for v in cam.data.view_frame(scene=scene)[:3]]
+    frame_size = (frame[2].x - frame[1].x, frame[1].y - frame[0].y, frame[0].z)
+    cam_rotation = cam.matrix_world.normalized().to_3x3()
+    bounds, depth = camera_view_bounds(objs, cam, scene=scene)
+    inside = (bounds[:, 0] >= margin) & (bounds[:, 1] <= 1.0 - margin) & (bounds[:, 2] >= margin) & (bounds[:, 3] <= 1.0 - margin) & (depth > 0.0)
+
+    fits = []
+    for i, obj in enumerate(objs):
+        # objects already in frame only need fitting when they may be scaled up
+        if inside[i] and not scale_up:
+            continue
+        pivot = project_points(np.array([obj.matrix_world.translation[:]]), view_matrix)[0]
+        if pivot[2] <= 0.0:
+            print("Viewport Align - skipping {0} behind the camera".format(obj.name))
+            continue
+        obj_bounds = bounds[i]
+        # the box leaves the frame, so check whether the vertices themselves do
+        if has_mesh(obj) and len(obj.data.vertices):
+            obj_bounds = vertex_view_bounds(obj, cam, scene=scene)
+            if obj_bounds is None:
+                continue
+        scale, (shift_u, shift_v) = solve_fit(obj_bounds, pivot, margin=margin, scale_up=scale_up)
+        # view units per world unit at the pivot's depth (constant for orthographic cameras)
+        per_unit = pivot[2] / frame_size[2] if cam.data.type != 'ORTHO' else 1.0
+        move = cam_rotation * Vector((shift_u * frame_size[0] * per_unit, shift_v * frame_size[1] * per_unit, 0.0))
+        if scale != 1.0 or move.length > 0.0:
+            fits.append((obj, scale, move))
+
+    # apply every transform together
+    for obj, scale, move in fits:
+        matrix = obj.matrix_world.copy()
+        fitted = (matrix.to_3x3() * scale).to_4x4()
+        fitted.translation = matrix.translation + move
+        obj.matrix_world = fitted
+    print("Viewport Align - fit {0} of {1} objects into the frame of {2}".format(len(fits), len(objs), cam.name))
+    return fits
+
+# set to fit every selected object into the camera frame instead of aligning the active one
+fit_selection = False
+
 # test runs
 #fit_vertices_to_frustum(bpy.context.object, bpy.context.scene.camera)
-cam, obj = get_current_cam_and_obj()
-obj_edges = get_edge_vertices_uv_xy(obj, cam)
-# reduce to only most extreme val
-#if obj_edges:
-#    obj_edges = {k: compare_abs_values_return_rel_values(v) for (k, v) in obj_edges.items()}
-#    calc_move_vertex_to_pivot_xy_cam_center(obj, cam, obj_edges)
-if obj_edges:   # selected obj
-    move_vertex_to_cam(obj_edges, obj, cam)
+if fit_selection:
+    fit_objects_to_frame()
+else:
+    cam, obj = get_current_cam_and_obj()
+    obj_edges = get_edge_vertices_uv_xy(obj, cam)
+    # reduce to only most extreme val
+    #if obj_edges:
+    #    obj_edges = {k: compare_abs_values_return_rel_values(v) for (k, v) in obj_edges.items()}
+    #    calc_move_vertex_to_pivot_xy_cam_center(obj, cam, obj_edges)
+    if obj_edges:   # selected obj
+        move_vertex_to_cam(obj_edges, obj, cam)
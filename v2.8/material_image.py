@@ -1,8 +1,17 @@
+import os
+import sys
 import bpy
+# image sizes come from file headers through the vse folder's shared image index
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vse"))
+from image_index import get_image_index
 
 # Use material nodes to display an image with transparency
 # script by Joshua (GitHub user Botmasher)
 
+# image to display, relative to the saved .blend
+img_path = bpy.path.abspath("//img.png")
+img_info = get_image_index().info(img_path)
+
 # add plane
 # TODO: create fresh new plane and add vertex data
 # img_plane = bpy.data.objects.new(
@@ -14,15 +23,18 @@ import bpy
 bpy.ops.mesh.primitive_plane_add()
 img_plane = bpy.context.view_layer.objects.active
 img_plane.name = "Img Plane"
+# match plane to the image's aspect ratio without loading its pixels
+if img_info and img_info['width'] and img_info['height']:
+    img_plane.scale.x = img_info['width'] / img_info['height']
 
 # add material to plane
 img_material = bpy.data.materials.new("img_mat")
 img_plane.active_material = img_material
-# TODO: add image texture data (the image)
-#bpy.data.images.new(name="test img")
 
 # set material image texture
 img_texture = bpy.data.textures.new("img_tex", 'IMAGE')
+if img_info:
+    img_texture.image = bpy.data.images.load(img_path, check_existing=True)
 img_material.use_nodes = True
 img_material.node_tree.nodes[1].type = 'MIX_SHADER'
 img_material.node_tree.nodes[1].inputs[0] = img_texture
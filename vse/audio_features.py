@@ -0,0 +1,216 @@
+import os
+import json
+import wave
+import hashlib
+import tempfile
+import numpy as np
+import bpy
+from audio_levels import frame_features, band_measure, smooth_envelope, sound_path, amplitude_to_db
+
+## Audio Feature Store
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Per-frame RMS, peak and onset strength for each sound file, computed once and
+## kept in memory-mapped .npy files keyed by the file's content hash and fps.
+## Looking up "loudness at frame F" only touches that row on disk, so even
+## two-hour timelines never load their features (or audio) into RAM.
+##
+## The store is shared by every audio tool: volume normalising reads its RMS and
+## peak columns, shape key band baking keeps its frequency band matrices here and
+## waveform_cache.py saves its waveform pyramids under the same content hashes.
+##
+## Onset strength is the frame-to-frame rise in RMS level (dB), floored at 0.
+
+# feature columns stored for every frame
+columns = ('rms', 'peak', 'onset')
+
+def measure_rms_peak(windows, weights, sample_rate):
+    """Weighted RMS and plain peak amplitude of each window"""
+    rms = np.sqrt(np.dot(windows ** 2, weights) / weights.sum())
+    peak = np.abs(windows).max(axis=1)
+    return np.stack((rms, peak), axis=1).astype(np.float32)
+
+def onset_strength(rms, floor_db=-120.0):
+    """Rise in level from the previous frame in dB, with falls clipped to zero"""
+    level = 20.0 * np.log10(np.maximum(rms, 10 ** (floor_db / 20.0)))
+    # concatenate rather than diff's prepend, which needs a newer NumPy than Blender 2.79 bundles
+    return np.maximum(np.diff(np.concatenate((level[:1], level))), 0.0)
+
+def hash_file(path, chunk_size=1 << 20):
+    """Hash a file's contents without reading it into memory at once"""
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def write_matrix(cache_path, matrix):
+    """Save a float32 matrix as a .npy that can be memory-mapped"""
+    # write to a temporary name first so an interrupted run leaves no partial cache
+    partial_path = cache_path + ".partial.npy"
+    memmap = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.float32, shape=matrix.shape)
+    memmap[:] = matrix
+    memmap.flush()
+    del memmap
+    os.replace(partial_path, cache_path)
+    return cache_path
+
+class AudioFeatures:
+    def __init__(self, matrix, fps):
+        # (frames, columns) memory-mapped array
+        self.matrix = matrix
+        self.fps = fps
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def column(self, name):
+        """Memory-mapped view of one feature for every frame"""
+        return self.matrix[:, columns.index(name)]
+
+    def at(self, frame, name='rms'):
+        """Value of a feature at a source frame, 0.0 outside the audio"""
+        if frame < 0 or frame >= len(self.matrix):
+            return 0.0
+        return float(self.matrix[int(frame), columns.index(name)])
+
+    def rms(self, frame):
+        return self.at(frame, 'rms')
+
+    def peak(self, frame):
+        return self.at(frame, 'peak')
+
+    def onset(self, frame):
+        return self.at(frame, 'onset')
+
+class FeatureStore:
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = bpy.path.abspath("//audio_features") if bpy.data.filepath else os.path.join(tempfile.gettempdir(), "audio_features")
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        # path -> {'mtime', 'size', 'hash'} so unchanged files are not rehashed
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.index = {}
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, 'r') as index_file:
+                self.index = json.load(index_file)
+        # opened feature maps by cache filename
+        self.opened = {}
+
+    def content_hash(self, path):
+        """Content hash of a file, rehashing only when its mtime or size changed"""
+        stat = os.stat(path)
+        entry = self.index.get(path)
+        if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return entry['hash']
+        self.index[path] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': hash_file(path)}
+        with open(self.index_path, 'w') as index_file:
+            json.dump(self.index, index_file)
+        return self.index[path]['hash']
+
+    def cache_path(self, path, fps, suffix=".npy"):
+        """Path in the store for data derived from a sound file at fps"""
+        return os.path.join(self.directory, "{0}_{1:g}fps{2}".format(self.content_hash(path), fps, suffix))
+
+    def features(self, path, fps):
+        """Memory-mapped per-frame features for a sound file at fps, analysed on first use"""
+        cache_path = self.cache_path(path, fps)
+        if cache_path in self.opened:
+            return self.opened[cache_path]
+        if not os.path.isfile(cache_path):
+            self.write(path, fps, cache_path)
+        self.opened[cache_path] = AudioFeatures(np.load(cache_path, mmap_mode='r'), fps)
+        return self.opened[cache_path]
+
+    def write(self, path, fps, cache_path):
+        """Analyse a sound file and write its feature matrix to a memory-mapped .npy"""
+        rms_peak = frame_features(path, fps, measure_rms_peak).reshape(-1, 2)
+        matrix = np.zeros((len(rms_peak), len(columns)), dtype=np.float32)
+        matrix[:, 0:2] = rms_peak
+        matrix[:, 2] = onset_strength(rms_peak[:, 0]) if len(rms_peak) else 0.0
+        return write_matrix(cache_path, matrix)
+
+    def bands(self, path, fps, bands=((20, 250), (250, 2000), (2000, 8000))):
+        """Memory-mapped (frames, bands) magnitudes of frequency bands, analysed on first use
+
+        Every band comes from the same vectorised STFT pass over the file.
+        """
+        band_names = "_".join("{0:g}-{1:g}".format(low, high) for low, high in bands)
+        cache_path = self.cache_path(path, fps, suffix="_bands_{0}.npy".format(band_names))
+        if cache_path in self.opened:
+            return self.opened[cache_path]
+        if not os.path.isfile(cache_path):
+            write_matrix(cache_path, frame_features(path, fps, band_measure(bands)).reshape(-1, len(bands)))
+        self.opened[cache_path] = np.load(cache_path, mmap_mode='r')
+        return self.opened[cache_path]
+
+    def strip_features(self, strip):
+        """Features for the sound behind a sound strip at the scene fps"""
+        scene = bpy.context.scene
+        fps = scene.render.fps / scene.render.fps_base
+        return self.features(sound_path(strip), fps)
+
+# one store shared by every audio tool in the session
+feature_store = None
+
+def get_feature_store():
+    """Return the shared feature store, creating it on first use"""
+    global feature_store
+    if feature_store is None:
+        feature_store = FeatureStore()
+    return feature_store
+
+def strip_levels(strip, store, fps):
+    """Measure RMS and peak in dB over the part of the source audio a strip plays"""
+    features = store.features(sound_path(strip), fps)
+    first = max(int(strip.animation_offset_start + strip.frame_offset_start), 0)
+    last = first + max(int(strip.frame_final_duration), 1)
+    rms = np.array(features.column('rms')[first:last], dtype=np.float64)
+    peak = np.array(features.column('peak')[first:last], dtype=np.float64)
+    if not len(rms):
+        return None
+    return {
+        'rms_db': amplitude_to_db(np.sqrt(np.mean(rms ** 2))),
+        'peak_db': amplitude_to_db(peak.max())
+    }
+
+def normalize_volumes(strips, target_db=-20.0, peak_ceiling_db=0.0, store=None):
+    """Set each sound strip's volume so its RMS lands on target_db without peaking past the ceiling
+
+    Arguments:
+    strips -- sound sequences to normalise
+    target_db -- loudness to aim for in dB RMS relative to full scale
+    peak_ceiling_db -- loudest peak allowed after applying the new volume
+    store -- FeatureStore to read and fill (defaults to the shared store)
+    """
+    store = get_feature_store() if store is None else store
+    scene = bpy.context.scene
+    fps = scene.render.fps / scene.render.fps_base
+    normalized = {}
+    for strip in strips:
+        if strip.type != 'SOUND':
+            continue
+        try:
+            levels = strip_levels(strip, store, fps)
+        except (wave.Error, EOFError, OSError) as e:
+            print("audio_features - skipping {0}: {1}".format(strip.name, e))
+            continue
+        if not levels:
+            continue
+        gain_db = min(target_db - levels['rms_db'], peak_ceiling_db - levels['peak_db'])
+        strip.volume = 10 ** (gain_db / 20.0)
+        normalized[strip.name] = strip.volume
+    return normalized
+
+def band_envelopes(path, fps, bands=((20, 250), (250, 2000), (2000, 8000)), attack=0.01, release=0.2, store=None):
+    """Per-frame band magnitudes smoothed and scaled so each band's loudest frame is 1.0"""
+    store = get_feature_store() if store is None else store
+    matrix = store.bands(path, fps, bands=bands)
+    envelopes = np.zeros(matrix.shape, dtype=np.float32)
+    for column in range(matrix.shape[1]):
+        envelope = smooth_envelope(matrix[:, column], fps, attack=attack, release=release)
+        loudest = envelope.max() if len(envelope) else 0.0
+        envelopes[:, column] = envelope / loudest if loudest > 0 else envelope
+    return envelopes
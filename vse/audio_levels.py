@@ -0,0 +1,136 @@
+import wave
+import numpy as np
+import bpy
+
+## Audio Levels
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Decode WAV audio behind sound strips with the stdlib wave module and NumPy and
+## measure per-frame features in one streaming pass. Results are cached on disk by
+## the shared feature store in audio_features.py.
+##
+## NOTE only PCM .wav files are decoded - other sound strips are skipped
+
+# numpy sample types for each WAV sample width in bytes (24-bit handled separately)
+sample_types = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+def decode_samples(data, sample_width, channels):
+    """Turn raw interleaved PCM bytes into mono float samples between -1.0 and 1.0"""
+    if sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+    elif sample_width == 1:
+        samples = np.frombuffer(data, dtype=np.uint8).astype(np.int32) - 128
+    else:
+        samples = np.frombuffer(data, dtype=sample_types[sample_width])
+    scale = float(1 << (8 * sample_width - 1))
+    samples = samples.astype(np.float32).reshape(-1, channels) / scale
+    # mix channels down to one
+    return samples.mean(axis=1)
+
+def read_wav_blocks(path, block_frames=262144):
+    """Stream a WAV file as (sample_rate, mono float block) pairs without loading it whole"""
+    wav = wave.open(path, 'rb')
+    try:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        while True:
+            data = wav.readframes(block_frames)
+            if not data:
+                break
+            yield (sample_rate, decode_samples(data, sample_width, channels))
+    finally:
+        wav.close()
+
+def amplitude_to_db(amplitude, floor_db=-120.0):
+    """Convert a linear amplitude to decibels relative to full scale"""
+    return max(20.0 * np.log10(amplitude), floor_db) if amplitude > 0 else floor_db
+
+def sound_path(strip):
+    """Absolute path to the audio file behind a sound strip"""
+    return bpy.path.abspath(strip.sound.filepath, library=strip.sound.library)
+
+def frame_features(path, fps, measure, block_frames=262144):
+    """Measure features of the audio under each frame at fps in one streaming pass
+
+    Windows are two frames wide and centred on each frame so neighbouring frames
+    overlap by half. Audio is streamed block by block rather than loaded whole.
+    Arguments:
+    measure -- function taking (windows, weights, sample_rate) for a stack of
+        frame windows and returning one row of features per window
+    """
+    features = []
+    buffer = None
+    total_samples = 0
+    for sample_rate, block in read_wav_blocks(path, block_frames=block_frames):
+        if buffer is None:
+            hop = sample_rate / float(fps)
+            width = max(2 * int(round(hop)), 2)
+            weights = np.hanning(width).astype(np.float32)
+            # pad the start so the first frame's window is centred on it
+            buffer = np.zeros(width // 2, dtype=np.float32)
+            base = -(width // 2)
+            frame = 0
+            measure_rate = lambda windows: measure(windows, weights, sample_rate)
+        total_samples += len(block)
+        buffer = np.concatenate((buffer, block))
+        frame, buffer, base = measure_frames(buffer, base, frame, hop, width, measure_rate, features)
+    if buffer is None:
+        return np.zeros(0, dtype=np.float32)
+    # pad the end and measure frames up to the end of the audio
+    frame_count = int(np.ceil(total_samples / hop))
+    buffer = np.concatenate((buffer, np.zeros(width, dtype=np.float32)))
+    measure_frames(buffer, base, frame, hop, width, measure_rate, features, frame_count=frame_count)
+    return np.concatenate(features) if features else np.zeros(0, dtype=np.float32)
+
+def measure_frames(buffer, base, frame, hop, width, measure, features, frame_count=None):
+    """Measure every frame whose window fits in buffer, then drop samples no later frame needs
+
+    Arguments:
+    buffer -- mono samples starting at absolute sample index base
+    frame -- first frame still to measure
+    measure -- function turning a stack of frame windows into feature rows
+    features -- list receiving an array of measured frame features
+    frame_count -- stop at this frame instead of the last one that fits
+    """
+    frames = np.arange(frame, frame + int(len(buffer) / hop) + 2)
+    if frame_count is not None:
+        frames = frames[frames < frame_count]
+    starts = np.round((frames + 0.5) * hop).astype(np.int64) - width // 2
+    fits = starts + width <= base + len(buffer)
+    frames = frames[fits]
+    starts = starts[fits] - base
+    if len(frames):
+        features.append(measure(buffer[starts[:, None] + np.arange(width)]))
+        frame = int(frames[-1]) + 1
+    next_start = int(round((frame + 0.5) * hop)) - width // 2
+    trim = min(max(next_start - base, 0), len(buffer))
+    return (frame, buffer[trim:], base + trim)
+
+def band_measure(bands):
+    """Build a measure returning the spectral magnitude of each (low, high) Hz band per window"""
+    def measure(windows, weights, sample_rate):
+        spectrum = np.abs(np.fft.rfft(windows * weights, axis=1))
+        frequencies = np.fft.rfftfreq(windows.shape[1], 1.0 / sample_rate)
+        columns = []
+        for low, high in bands:
+            in_band = (frequencies >= low) & (frequencies < high)
+            band = spectrum[:, in_band] if in_band.any() else np.zeros((len(spectrum), 1), dtype=spectrum.dtype)
+            columns.append(np.sqrt(np.mean(band ** 2, axis=1)))
+        return np.stack(columns, axis=1).astype(np.float32)
+    return measure
+
+def smooth_envelope(values, fps, attack=0.01, release=0.2):
+    """Follow an amplitude curve that rises within attack seconds and falls within release seconds"""
+    attack_coefficient = np.exp(-1.0 / (attack * fps)) if attack > 0 else 0.0
+    release_coefficient = np.exp(-1.0 / (release * fps)) if release > 0 else 0.0
+    smoothed = []
+    level = 0.0
+    for value in values.tolist():
+        coefficient = attack_coefficient if value > level else release_coefficient
+        level = value + coefficient * (level - value)
+        smoothed.append(level)
+    return np.array(smoothed, dtype=np.float32)
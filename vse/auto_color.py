@@ -6,9 +6,15 @@
 #  - target strips contain a shared subname findable as a substring in strip names
 #  - the strips are already placed in the sequence editor in the named sequencer scene
 #  - the color balance strip modifier type='COLOR_BALANCE'
+# Grades can be named presets read from a JSON file (see color_presets.json)
 ####
 
+import os
+import re
+import json
+import time
 import bpy
+from name_index import get_name_index
 
 # string match name within movie strips to color balance
 # TODO more flexible name matching using regex
@@ -25,15 +31,26 @@ new_lift = [0.97, 0.97, 1.0]
 new_gamma = [0.88, 0.83, 0.83]
 new_gain = [1.45, 1.4, 1.38]
 
+# name of a preset to grade with instead of the values above (None to use them)
+grade_preset = None
+
+# JSON file mapping preset names to lift, gamma and gain
+presets_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "color_presets.json")
+
+def load_presets(path=presets_path):
+    """Read named lift/gamma/gain grades from a JSON file"""
+    with open(bpy.path.abspath(path), 'r') as presets_file:
+        return json.load(presets_file)
+
 def recolor_sequence(strip, lift, gamma, gain, modifier_name='Color Balance', remove_existing=True, balance_desaturated=True, desaturated_threshold=0.0):
     """Add and set a color balance modifier on a single sequence"""
     if not hasattr(strip, 'bl_rna') or not strip.bl_rna.name in ['Image Sequence', 'Movie Sequence']:
         return
 
-    # remove any Color Balance modifiers
+    # remove any Color Balance modifiers straight from the strip (no active strip or operator needed)
     if remove_existing:
-        for modifier in strip.modifiers:
-            remove_modifiers and modifier_name in modifier.name and bpy.ops.sequencer.strip_modifier_remove(name=modifier.name)
+        for modifier in [modifier for modifier in strip.modifiers if modifier_name in modifier.name]:
+            strip.modifiers.remove(modifier)
 
     # setup new Color Balance modifier
     if balance_desaturated or strip.color_saturation > desaturated_threshold:
@@ -45,27 +62,35 @@ def recolor_sequence(strip, lift, gamma, gain, modifier_name='Color Balance', re
 
     return strip
 
-def recolor_named_sequences(name_match='', use_selected=False, lift=[], gamma=[], gain=[], balance_desaturated=True):
-    """Search through sequences and color balance ones with a matching name"""
+def recolor_strips(strips, lift, gamma, gain, modifier_name='Color Balance', balance_desaturated=True):
+    """Replace the color balance modifiers on many strips in one pass"""
+    return [strip for strip in strips if recolor_sequence(strip, lift, gamma, gain, modifier_name=modifier_name, balance_desaturated=balance_desaturated)]
+
+def recolor_named_sequences(name_match='', use_selected=False, lift=[], gamma=[], gain=[], balance_desaturated=True, preset=None, presets_path=presets_path):
+    """Search through sequences and color balance ones with a matching name
+
+    Pass a preset name to grade with lift, gamma and gain from the presets file.
+    """
+    if preset:
+        grade = load_presets(presets_path)[preset]
+        lift, gamma, gain = grade['lift'], grade['gamma'], grade['gain']
 
     if not lift or not gamma or not gain:
         return
 
     scene = bpy.context.scene
     bpy.context.scene.sequence_editor_create()
+    timer = time.time()
 
-    modified_sequences = []
-
-    # search through all sequencer strips
-    for s in scene.sequence_editor.sequences:
-        scene.sequence_editor.active_strip = None
-        # find strips matching your name pattern
-        if name_match in s.name and (not use_selected or s.select):
-            print("modifying sequence {0}".format(s.name))
-            scene.sequence_editor.active_strip = s
-            colored_s = recolor_sequence(s, new_lift, new_gamma, new_gain, balance_desaturated=balance_desaturated)
-            colored_s and modified_sequences.append(s)
+    # look up top level image and movie strips matching your name in the shared name index
+    name_index = get_name_index(scene)
+    names = name_index.find(pattern=re.escape(name_match), types=['IMAGE', 'MOVIE'], top_level=True)
+    strips = [s for s in name_index.strips(names) if not use_selected or s.select]
+    modified_sequences = recolor_strips(strips, lift, gamma, gain, balance_desaturated=balance_desaturated)
 
+    print("auto_color - graded {0} of {1} matching sequences{2} in {3:.4f}s".format(
+        len(modified_sequences), len(strips), " with preset '{0}'".format(preset) if preset else "", time.time() - timer
+    ))
     return modified_sequences
 
-recolor_named_sequences(name_match=target_strips_name, use_selected=use_selected, lift=new_lift, gamma=new_gamma, gain=new_gain, balance_desaturated=balance_desaturated)
+recolor_named_sequences(name_match=target_strips_name, use_selected=use_selected, lift=new_lift, gamma=new_gamma, gain=new_gain, balance_desaturated=balance_desaturated, preset=grade_preset)
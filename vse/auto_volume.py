@@ -1,5 +1,6 @@
 import bpy
-import re
+from audio_features import normalize_volumes
+from name_index import get_name_index
 
 ####
 # MASS AUDIO VOLUME SET
@@ -15,6 +16,9 @@ target_strips_re = '001'
 # new target volume to set
 updated_volume = 1.92
 
+# loudness in dB RMS to normalise matching strips to instead (None to set updated_volume)
+normalize_to_db = None
+
 def is_audio_sequence(obj):
     """Check if the object is a sequencer strip"""
     if obj and hasattr(obj, 'volume'):
@@ -30,13 +34,9 @@ def set_volume(strip, new_volume):
 
 def filter_strips(strips, match_name='', strip_type='SOUND'):
     """Filter down sequences of a type that have names matching a regex"""
-    match_name = '.*' if not match_name else match_name
-    r_name = re.compile(match_name)
-    matches = []
-    for strip in strips:
-        match = r_name.search(strip.name)
-        match and strip.type == strip_type and matches.append(strip)
-    return matches
+    # cached regex matches from the shared name index
+    names = get_name_index().find(pattern=match_name or None, types=[strip_type])
+    return [strip for strip in strips if strip.name in names]
 
 def get_selected(strips):
     """Return only sequences where select is True"""
@@ -51,4 +51,13 @@ def set_mass_volume(strips=bpy.context.scene.sequence_editor.sequences, name='',
         set_volume(strip, volume)
     return volume_strips
 
-set_mass_volume(volume=updated_volume, name=target_strips_re)
+def normalize_mass_volume(strips=bpy.context.scene.sequence_editor.sequences, name='', target_db=-20.0, selected_only=False):
+    """Normalise the loudness of sequences, optionally limiting by name regex or selection"""
+    strips = get_selected(strips) if selected_only else strips
+    volume_strips = filter_strips(strips, match_name=name)
+    return normalize_volumes(volume_strips, target_db=target_db)
+
+if normalize_to_db is None:
+    set_mass_volume(volume=updated_volume, name=target_strips_re)
+else:
+    normalize_mass_volume(name=target_strips_re, target_db=normalize_to_db)
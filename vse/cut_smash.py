@@ -1,5 +1,8 @@
+import time
+import bisect
 import bpy
 from bpy.props import *
+from frame_splitter import new_substrip, substrip_types
 
 bpy.types.Scene.cut_smash_direction = EnumProperty(
     items = [('left', 'Left', 'Cut and close gap before playhead'),
@@ -49,48 +52,224 @@ class CutSmashPanel (bpy.types.Panel):
         else:
             self.layout.operator('strip.mark_lift', text="Set")
 
+# strip types with their own source frames to soft cut - effect strips are not trimmed independently
+trimmable_types = ('IMAGE', 'MOVIE', 'SOUND', 'SCENE', 'META', 'MOVIECLIP', 'MASK')
+
+def strip_span(strip):
+    """Return the visible (start, end) timeline frames of a strip"""
+    return (strip.frame_final_start, strip.frame_final_end)
+
+def is_input_bound(strip):
+    """Check if a strip is an effect that moves with its input strips"""
+    return getattr(strip, 'input_1', None) is not None
+
+def plan_cut_smash(strips, cut_names, frame, direction='left', trash_outside=False, floor=0):
+    """Plan a soft cut at frame on the named strips and the gap close that follows
+
+    Computes every edit up front instead of snapping, cutting and removing gaps
+    through operators. Each strip is visited a fixed number of times.
+    Arguments:
+    strips -- top-level sequences to consider when finding and closing the gap
+    cut_names -- names of the strips to soft cut at frame
+    frame -- timeline frame to cut at
+    direction -- 'left' trims strip heads to frame, 'right' trims strip tails to frame
+    trash_outside -- remove cut strips lying wholly on the trimmed side of frame
+    floor -- earliest frame a gap may close back to when no strip precedes it
+    """
+    plan = {'offsets': [], 'remove': [], 'shift': [], 'delta': 0, 'frame': frame}
+    spans = {}
+
+    # first pass: soft cut named strips and record each strip's span after the cut
+    for strip in strips:
+        start, end = strip_span(strip)
+        if strip.name in cut_names:
+            if direction == 'left' and start < frame < end:
+                plan['offsets'].append((strip, 'frame_offset_start', frame - strip.frame_start))
+                start = frame
+            elif direction == 'right' and start < frame < end:
+                plan['offsets'].append((strip, 'frame_offset_end', strip.frame_start + strip.frame_duration - frame))
+                end = frame
+            elif trash_outside and ((direction == 'left' and end <= frame) or (direction == 'right' and start >= frame)):
+                plan['remove'].append(strip)
+                continue
+        spans[strip.name] = (strip, start, end)
+
+    # probe the frame gap_remove would have looked at (just before a head cut, at a tail cut)
+    probe = frame - 1 if direction == 'left' else frame
+
+    # second pass: find the gap around the probe frame across all channels
+    gap_start = None
+    gap_end = None
+    for strip, start, end in spans.values():
+        if start <= probe < end:
+            return plan
+        if end <= probe and (gap_start is None or end > gap_start):
+            gap_start = end
+        if start > probe and (gap_end is None or start < gap_end):
+            gap_end = start
+    if gap_end is None:
+        return plan
+    gap_start = min(floor, probe + 1) if gap_start is None else gap_start
+    plan['delta'] = gap_end - gap_start
+
+    # third pass: pull every downstream strip back by the gap width
+    if plan['delta'] > 0:
+        for strip, start, end in spans.values():
+            if start > probe and not is_input_bound(strip):
+                plan['shift'].append((start, strip, strip.frame_start - plan['delta']))
+
+    return plan
+
+def split_strips(strips, frame):
+    """Soft cut strips crossing frame in two, returning the new pieces right of frame"""
+    pieces = []
+    for strip in strips:
+        start, end = strip_span(strip)
+        if not start < frame < end or strip.type not in substrip_types:
+            continue
+        source_offset = strip.frame_offset_start + frame - start
+        # trim the original first so the new piece never overlaps it
+        strip.frame_offset_end += end - frame
+        pieces.append(new_substrip(strip, source_offset, end - frame, frame))
+    return pieces
+
+def apply_cut_smash(plan, sequences):
+    """Write a planned cut smash to the sequencer in one batch"""
+    for strip, attr, value in plan['offsets']:
+        setattr(strip, attr, value)
+    for strip in plan['remove']:
+        sequences.remove(strip)
+    # move earliest strips first so each lands in space already vacated
+    for start, strip, frame_start in sorted(plan['shift'], key=lambda shift: shift[0]):
+        strip.frame_start = frame_start
+    return plan
+
+def merge_ranges(ranges):
+    """Sort (start, end) frame ranges and join any that touch or overlap"""
+    merged = []
+    for start, end in sorted(ranges):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def subtract_ranges(ranges, removed):
+    """Cut merged removed ranges out of merged ranges, returning what is left"""
+    left = []
+    i = 0
+    for start, end in ranges:
+        while i < len(removed) and removed[i][1] <= start:
+            i += 1
+        j = i
+        while j < len(removed) and removed[j][0] < end:
+            removed[j][0] > start and left.append((start, removed[j][0]))
+            start = max(start, removed[j][1])
+            j += 1
+        start < end and left.append((start, end))
+    return left
+
+def plan_range_removals(strips, ranges, cut_names=None):
+    """Plan removing timeline frame ranges from every strip and closing all of them at once
+
+    Strips overlapping a range are soft cut around it: the first kept piece stays
+    the original strip and later pieces become substrips. Each strip or piece then
+    moves left by the total frames removed before it. Strips that cannot be trimmed
+    (effect strips) or split (no source media) where a cut needs it are left
+    untouched and listed under 'skipped', so applying the plan never fails halfway.
+    Arguments:
+    strips -- top-level sequences to cut and shift
+    ranges -- (start, end) timeline frames to remove, end exclusive
+    cut_names -- names of the only strips to cut (defaults to all), the rest just shift
+    """
+    ranges = merge_ranges(ranges)
+    plan = {'offsets': [], 'remove': [], 'pieces': [], 'shift': [], 'skipped': [], 'ranges': ranges, 'delta': 0}
+    if not ranges:
+        return plan
+    # frames removed before each range's end, for bisecting a strip's leftward shift
+    ends = [end for start, end in ranges]
+    removed_before = [0]
+    for start, end in ranges:
+        removed_before.append(removed_before[-1] + end - start)
+    plan['delta'] = removed_before[-1]
+    shift_at = lambda frame: removed_before[bisect.bisect_right(ends, frame)]
+
+    for strip in strips:
+        if is_input_bound(strip):
+            continue
+        start, end = strip_span(strip)
+        if cut_names is not None and strip.name not in cut_names:
+            shift = shift_at(start)
+            shift and plan['shift'].append((start, strip, strip.frame_start - shift))
+            continue
+        kept = subtract_ranges([(start, end)], ranges)
+        if not kept:
+            plan['remove'].append(strip)
+            continue
+        first_start, first_end = kept[0]
+        trimmed = first_start != start or first_end != end
+        if (trimmed and strip.type not in trimmable_types) or (len(kept) > 1 and strip.type not in substrip_types):
+            plan['skipped'].append(strip)
+            continue
+        if first_start != start:
+            plan['offsets'].append((strip, 'frame_offset_start', strip.frame_offset_start + first_start - start))
+        if first_end != end:
+            plan['offsets'].append((strip, 'frame_offset_end', strip.frame_offset_end + end - first_end))
+        shift = shift_at(first_start)
+        shift and plan['shift'].append((first_start, strip, strip.frame_start - shift))
+        for piece_start, piece_end in kept[1:]:
+            source_offset = strip.frame_offset_start + piece_start - start
+            plan['pieces'].append((piece_start, strip, source_offset, piece_end - piece_start, piece_start - shift_at(piece_start)))
+    return plan
+
+def apply_range_removals(plan, sequences):
+    """Write planned range removals to the sequencer in one batch"""
+    moves = [(start, strip, frame_start, None) for start, strip, frame_start in plan['shift']]
+    moves += [(start, strip, frame, (offset, length)) for start, strip, offset, length, frame in plan['pieces']]
+    for strip, attr, value in plan['offsets']:
+        setattr(strip, attr, value)
+    for strip in plan['remove']:
+        sequences.remove(strip)
+    # move and create earliest first so each lands in space already vacated
+    created = []
+    for start, strip, frame, piece in sorted(moves, key=lambda move: move[0]):
+        if piece is None:
+            strip.frame_start = frame
+        else:
+            # substrips take source frames offset from the original, so trimming it first is safe
+            created.append(new_substrip(strip, piece[0], piece[1], frame))
+    plan['created'] = created
+    return plan
+
+def cut_smash(cut_names, frame=None, direction='left', trash_outside=False):
+    """Soft cut the named strips at frame and close the resulting gap without sequencer ops"""
+    scene = bpy.context.scene
+    frame = scene.frame_current if frame is None else frame
+    sequences = scene.sequence_editor.sequences
+    timer = time.time()
+    plan = plan_cut_smash(sequences, set(cut_names), frame, direction=direction, trash_outside=trash_outside, floor=scene.frame_start)
+    apply_cut_smash(plan, sequences)
+    print("cut_smash - {0} strips checked, {1} cut, {2} removed, {3} shifted by {4} frames in {5:.4f}s".format(
+        len(sequences), len(plan['offsets']), len(plan['remove']), len(plan['shift']), plan['delta'], time.time() - timer
+    ))
+    return plan
+
 def cut_smash_left(memos):
     """Offset beginning of selected strips to current frame and close gap with previous strips"""
-    vse = bpy.context.scene.sequence_editor
-    # store location of the gap created by this soft cut
-    gap = bpy.context.scene.frame_current - 1
-    # iterate through all strips in sequencer
+    plan = cut_smash([strip_name for strip_name in memos if memos[strip_name] == 0], direction='left')
     for strip_name in memos:
-        # check only selected strips that haven't been analyzed
-        if memos[strip_name] == 0:
-            # "soft cut" (offset) the strip and store solution in memos
-            try:
-                vse.sequences_all[strip_name].frame_offset_start = bpy.context.scene.frame_current - vse.sequences_all[strip_name].frame_start
-                memos[strip_name] = 1
-                # run function again to catch any uncut selected strips
-                #cut_smash(memos)
-            except:
-                pass
-    # skip to the frame before this strip and close gap
-    bpy.context.scene.frame_current = gap
-    bpy.ops.sequencer.gap_remove()
+        memos[strip_name] = 1
     # set the playhead to new beginning of strip to resume editing at same video location
-    if strip_name != None:
-        bpy.context.scene.frame_current = vse.sequences_all[strip_name].frame_offset_start + vse.sequences_all[strip_name].frame_start
+    bpy.context.scene.frame_current = plan['frame'] - plan['delta']
     return None
 
 def cut_smash_right (memo):
     """Offset end of selected strips to current frame and close gap with next strips"""
-    # store shortened reference to sequencer
-    vse = bpy.context.scene.sequence_editor
-    # store location of the gap created by this soft cut
-    playhead = bpy.context.scene.frame_current
-    # "soft cut" (offset) the strips and set as solved in memo ('name':1)
+    cut_smash([strip_name for strip_name in memo], direction='right')
     for strip_name in memo:
-        # select the sequence and its ending handle
-        vse.sequences_all[strip_name].select = True
-        vse.sequences_all[strip_name].select_right_handle = True
-        bpy.ops.sequencer.snap (frame=playhead)
-        vse.sequences_all[strip_name].select = False
-        vse.sequences_all[strip_name].select_right_handle = False
         memo[strip_name] = 1
-    # close gap to the right of the playhead (note playhead frame is now empty)
-    bpy.ops.sequencer.gap_remove()
     return None
 
 def cut_simple (memo):
@@ -170,57 +349,22 @@ def lift_clip ():
     in_frame = int(in_marker.name.split('_')[1])
     out_frame = int(out_marker.name.split('_')[1])
     
-    # cut selected strips at marked in and out points
-    for strip in bpy.context.scene.sequence_editor.sequences_all:
-        if strip.select:
-            bpy.ops.sequencer.cut (frame=in_frame, type='SOFT')
-            bpy.ops.sequencer.cut (frame=out_frame, type='SOFT')
-        else:
-            pass
-
-    # prepare trash list of edge strips beyond the marked in and out points
-    marked_for_deletion = []
-    # one cut strip to find out where it lands after deleting and closing gaps 
-    cut_strip = None
-    for strip in bpy.context.scene.sequence_editor.sequences_all:
-        # prepare to delete cut strips to the left of lifted
-        if strip.select and bpy.context.scene.cut_smash_direction == 'left':
-            if strip.frame_start + strip.frame_offset_start < in_frame:
-                marked_for_deletion.append(strip)
-        # prepare to delete cut strips to the right of lifted
-        elif strip.select and bpy.context.scene.cut_smash_direction == 'right':
-            if strip.frame_start + strip.frame_offset_start >= out_frame:
-                marked_for_deletion.append(strip)
-        else:
-            pass
-
-        # track one cut strip to find out where it lands after delete and close gaps
-        if strip.select and strip.frame_start+strip.frame_offset_start == in_frame:
-            cut_strip = strip
-
-    # toggle to deselect all strips
-    bpy.ops.sequencer.select_all()
-    
-    # select and delete the strips that surround the lifted strip
-    for trash in marked_for_deletion:
-        trash.select = True
-        bpy.ops.sequencer.delete()
-
-    # close gaps either to the left or the right of lifted strip
+    # soft cut selected strips at both markers, then trash what lies beyond the marker
+    # on the lifted side and close the gap in one batched edit
+    selected = [strip for strip in bpy.context.scene.sequence_editor.sequences if strip.select]
+    selected += split_strips(selected, in_frame)
+    selected += split_strips(selected, out_frame)
+    selected_names = [strip.name for strip in selected]
     if bpy.context.scene.cut_smash_direction == 'left':
-        bpy.context.scene.frame_set(in_frame-1)
-        bpy.ops.sequencer.gap_remove()
+        plan = cut_smash(selected_names, frame=in_frame, direction='left', trash_outside=True)
+        # move playhead to the new location of your strips
+        bpy.context.scene.frame_set(in_frame - plan['delta'])
     elif bpy.context.scene.cut_smash_direction == 'right':
-        bpy.context.scene.frame_set(out_frame)
-        bpy.ops.sequencer.gap_remove()
+        cut_smash(selected_names, frame=out_frame, direction='right', trash_outside=True)
+        bpy.context.scene.frame_set(in_frame)
     else:
         pass
 
-    # move playhead to the new location of your strips
-    if cut_strip != None:
-        bpy.context.scene.frame_set (cut_strip.frame_start + strip.frame_offset_start)
-        print (cut_strip)
-
     # delete the in and out markers
     bpy.context.scene.timeline_markers.remove(in_marker)
     # current code was already removing out_marker, so next command threw not found
@@ -240,10 +384,9 @@ class CutSmashOperator (bpy.types.Operator):
     def execute (self, context):
         # memoization for cut_smash
         memos = {}
-        for strip in bpy.context.scene.sequence_editor.sequences_all:
+        for strip in bpy.context.scene.sequence_editor.sequences:
             if strip.select:
                 memos[strip.name] = 0
-                strip.select = False
         if bpy.context.scene.cut_smash_direction == 'left':
             cut_smash_left(memos)
         elif bpy.context.scene.cut_smash_direction == 'right':
@@ -1,6 +1,12 @@
 #!/usr/bin/python
-import bpy
+import os
 import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bpy
+from name_index import get_name_index
+from audio_features import hash_file
 
 ## Find and display relevant media sequence strips from the Blender VSE
 ##
@@ -27,6 +33,10 @@ import re
 ## 	7) call print_sequence_names to output the names to console (shell if running Blender through prompt)
 ## 		- set ignore_duplication=False to list duplicates as well (e.g. myaudio.001, myaudio.002)
 ##
+##	Media audit mode (set media_audit below) instead collects every file the strips use,
+##	including each frame of image sequences, checks them on a thread pool and writes a
+##	JSON manifest of sizes, missing files, duplicates and files used by many strips.
+##
 
 # TODO take documentation from above and include within multiline comments
 # TODO add ability to pass ignored_res_list into run function
@@ -47,17 +57,22 @@ def find_sequence_names(sequencer=bpy.context.scene.sequence_editor, sequence_ty
 	if sequencer is None:
 		print("Error finding sequence names: SEQUENCE_EDITOR not found")
 		return None
+	# query the shared name index instead of rescanning every strip
+	name_index = get_name_index(sequencer.id_data)
 	found_sequences = {}
-	for sequence_type in sequence_types: found_sequences[sequence_type] = set([])
-	for sequence in sequencer.sequences_all:
-		sequence.type in sequence_types and \
-		(sequence.type not in ignored_res_dict.keys() \
-		or not ignored_res_dict[sequence.type] \
-		or not re.match(ignored_res_dict[sequence.type], \
-		sequence.name)) \
-			and found_sequences[sequence.type].add(sequence)
+	for sequence_type in sequence_types:
+		names = name_index.find(types=[sequence_type], exclude=ignored_res_dict.get(sequence_type) or None)
+		found_sequences[sequence_type] = set(name_index.strips(names))
 	return found_sequences
 
+def export_sequence_names(sequences_by_type, path, file_format='csv'):
+	"""Write found sequences by type to a CSV or JSON file"""
+	name_index = get_name_index()
+	names = set(sequence.name for sequences in sequences_by_type.values() for sequence in sequences)
+	if file_format == 'json':
+		return name_index.export_json(names, path)
+	return name_index.export_csv(names, path)
+
 def print_sequence_names(sequences_by_type, ignore_duplication=True, full_paths=True):
 	"""Output the name of each sequence in a dictionary of sequences by type,
 	optionally ignoring unique Blender duplication suffix"""
@@ -111,4 +126,91 @@ def run_strip_finder(sequence_types=['IMAGE', 'MOVIE', 'SOUND'], ignored_names={
 	# NOTE if full_paths is set to False filenames may contain data duplication suffix
 	print_sequence_names(sequences, full_paths=True, ignore_duplication=ignore_duplication)
 
-run_strip_finder(sequence_types=['SOUND', 'IMAGE'], ignored_names={'SOUND': ["audio-"], 'MOVIE': [], 'IMAGE': []})
+def strip_media_paths(sequence):
+	"""List absolute paths of every file a strip reads, one per frame for image sequences"""
+	if sequence.type == 'SOUND':
+		return [bpy.path.abspath(sequence.sound.filepath, library=sequence.sound.library)] if sequence.sound else []
+	if sequence.type == 'MOVIE':
+		return [bpy.path.abspath(sequence.filepath)]
+	if sequence.type == 'IMAGE':
+		directory = bpy.path.abspath(sequence.directory)
+		return [os.path.join(directory, element.filename) for element in sequence.elements]
+	return []
+
+def collect_media(sequencer, sequence_types=["SOUND", "MOVIE", "IMAGE"]):
+	"""Map each media file path to the names of the strips using it"""
+	media = {}
+	for sequence in sequencer.sequences_all:
+		if sequence.type not in sequence_types:
+			continue
+		for path in strip_media_paths(sequence):
+			media.setdefault(os.path.normpath(path), []).append(sequence.name)
+	return media
+
+def stat_media(path):
+	"""Check whether a media file exists and read its size and modified time"""
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return {'exists': False, 'size': None, 'mtime': None}
+	return {'exists': True, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def audit_media(sequencer=bpy.context.scene.sequence_editor, hash_files=False, shared_threshold=2, manifest_path=None, workers=16):
+	"""Verify every media file the strips use and build a manifest of the results
+
+	Files are stat'ed (and optionally hashed) on a thread pool. Duplicates are files
+	with matching contents, found among same sized files when hashing.
+	Arguments:
+	hash_files -- hash file contents to find duplicates under different paths
+	shared_threshold -- list files used by at least this many strips
+	manifest_path -- write the manifest as JSON to this path when set
+	"""
+	if sequencer is None:
+		print("Error auditing media: SEQUENCE_EDITOR not found")
+		return None
+	timer = time.time()
+	media = collect_media(sequencer)
+	paths = sorted(media)
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		stats = dict(zip(paths, pool.map(stat_media, paths)))
+		hashes = {}
+		if hash_files:
+			# only files sharing a size with another file can be duplicates
+			sizes = {}
+			for path in paths:
+				stats[path]['exists'] and sizes.setdefault(stats[path]['size'], []).append(path)
+			candidates = [path for same_size in sizes.values() if len(same_size) > 1 for path in same_size]
+			hashes = dict(zip(candidates, pool.map(hash_file, candidates)))
+	files = {}
+	by_hash = {}
+	for path in paths:
+		files[path] = dict(stats[path], strips=sorted(media[path]))
+		if path in hashes:
+			files[path]['hash'] = hashes[path]
+			by_hash.setdefault(hashes[path], []).append(path)
+	manifest = {
+		'files': files,
+		'missing': [path for path in paths if not stats[path]['exists']],
+		'duplicates': sorted(same for same in by_hash.values() if len(same) > 1),
+		'shared': {path: len(media[path]) for path in paths if len(media[path]) >= shared_threshold},
+		'total_size': sum(stats[path]['size'] or 0 for path in paths)
+	}
+	print("\nMedia Audit\n - {0} files ({1:.1f} MB) checked in {2:.2f}s\n - {3} missing, {4} duplicate groups, {5} shared by {6}+ strips".format(
+		len(paths), manifest['total_size'] / 1048576.0, time.time() - timer,
+		len(manifest['missing']), len(manifest['duplicates']), len(manifest['shared']), shared_threshold
+	))
+	for path in manifest['missing']: print("missing: {0}".format(path))
+	if manifest_path:
+		with open(bpy.path.abspath(manifest_path), 'w') as manifest_file:
+			json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+	return manifest
+
+# set to audit media files instead of printing strip names
+media_audit = False
+media_audit_hash = False
+media_manifest_path = "//media_manifest.json"
+
+if media_audit:
+	audit_media(hash_files=media_audit_hash, manifest_path=media_manifest_path)
+else:
+	run_strip_finder(sequence_types=['SOUND', 'IMAGE'], ignored_names={'SOUND': ["audio-"], 'MOVIE': [], 'IMAGE': []})
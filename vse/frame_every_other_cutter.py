@@ -1,147 +1,150 @@
+import os
+import re
+import sys
+import argparse
 import bpy
+# blender -P does not put the script's folder on the path for sibling imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from frame_splitter import new_substrip
 
 ## Every Other Cutter
 ##
 ## Checker cut every other frame or every other group of n frames from a strip
 ## or every other strip or every other group of n strips from a strip group.
 ## Used for eliminating noise such as motion blur frames in repetitive renders.
+##
+## Kept frame groups are computed up front and only the surviving substrips are
+## created, so no strips are duplicated, selected or deleted through operators.
+## Runs headless across every strip whose name matches a pattern:
+##
+##   blender -b project.blend -P frame_every_other_cutter.py -- --pattern "^anim" --interval 2 --save
+##
+
+# strip types substrips can be created from
+cuttable_types = ('IMAGE', 'MOVIE', 'SOUND')
 
 def arrange_strips_by_time(strips, descending=False):
     """Sort a list of strips by start frame"""
-    return sorted(strips, lambda x: x.frame_start, reversed=descending)
-
-def select_strip(strip, deselect=False):
-    """Set one strip's select attribute to True"""
-    if not strip or not hasattr(strip, 'frame_start'):
-        return
-    strip.select = not deselect
-    return strip
-
-def deselect_strips():
-    """Set all sequencer strips' select attributes to False"""
-    for strip in bpy.context.scene.sequence_editor.sequences_all:
-        select_strip(strip, deselect=True)
-    bpy.context.scene.sequence_editor.active_strip = None
-
-def activate_lone_strip(strip):
-    """Deselect all strips and activate only this strip"""
-    deselect_strips()
-    select_strip(strip)
-    bpy.context.scene.sequence_editor.active_strip = strip
-    return strip
-
-def run_sequencer_op(op):
-    """Switch area to sequence editor and run sequencer op"""
-    original_area = bpy.context.area
-    sequence_area = 'SEQUENCE_EDITOR'
-    bpy.context.area.type = squence_area
-    try:
-        op()
-    except:
-        raise Exception("Failed to run op {0} in SEQUENCE_EDITOR".format(op))
-    bpy.context.area.type = original_area
-    return
+    return sorted(strips, key=lambda x: x.frame_final_start, reverse=descending)
 
 def remove_strip(strip):
     """Delete the strip from the sequencer"""
-    activate_lone_strip(strip)
-    run_sequencer_op(bpy.ops.sequencer.delete)
+    bpy.context.scene.sequence_editor.sequences.remove(strip)
     return
 
-def duplicate_strip(strip):
-    """Make and return a copy of the sequence"""
-    activate_lone_strip(strip)
-    run_sequencer_op(bpy.ops.sequencer.duplicate)
-    new_strip = bpy.context.scene.sequence_editor.active_strip
-    return new_strip
-
-def strip_creator(strip):
-    """Return new strip creation method accounting for strip type"""
-    # store method for creating substrip copies of same strip type
-    strip_type = strip.type.lower()
-    try:
-        create_strip = getattr(bpy.context.scene.sequence_editor.sequences, 'new_{0}'.format(strip_type))
-    except:
-        raise Exception("unable to find a new strip creation method on {0}".format(strip))
-    return create_strip
-
-def every_other_group_cut(strips):
+def checker_intervals(duration, interval=1, is_odd=False):
+    """List the (offset, length) frame groups kept when checker cutting duration frames
+
+    Groups of interval frames alternate between kept and cut. Even groups are kept
+    unless is_odd is set, in which case even groups are cut and odd groups are kept.
+    """
+    first_kept = interval if is_odd else 0
+    return [(offset, min(interval, duration - offset)) for offset in range(first_kept, duration, interval * 2)]
+
+def every_other_group_cut(strips, is_odd=False):
     """Checker cut every other strip in a group of strips"""
-    if strips.type != list:
+    if type(strips) is not list:
         return
     strips_remaining = []
-    toggle = False
-    arrange_strips_by_time(strips)
-    deselect_strips()
-    for strip in strips:
-        if toggle:
+    # T to cut even strips, F for odd
+    checker_cut = is_odd
+    for strip in arrange_strips_by_time(strips):
+        if checker_cut:
             remove_strip(strip)
+        else:
             strips_remaining.append(strip)
-        toggle = not odds
+        checker_cut = not checker_cut
     return strips_remaining
 
-def every_other_cut(strip=bpy.context.scene.sequence_editor.active_strip, interval=1, is_odd=False):
-    """Cut a single strip into substrips of interval length then delete every other substrip"""
-    if not strip or not hasattr(strip, 'frame_start') or interval < 1:
-        return
-    strips_remaining = []
-    toggle = False
-    deselect_strips()
-    bpy.context.scene.frame_current = strip.frame_start
-
-    # subcut strip and checker cut
-    # TODO verify range includes cut within final incomplete interval
-    # TODO allow reverse (neg) strip traversal and checker cutting
-    substrip_count = int(strip.frame_final_duration / interval)   # how many frame groups
-
+def every_other_cut(strip, interval=1, is_odd=False, close_gaps=False):
+    """Keep every other group of interval frames in a strip as its own substrip
+
+    Arguments:
+    strip -- a single image, movie or sound sequence
+    interval -- number of frames in each kept or cut group
+    is_odd -- cut even groups and keep odd groups instead of the reverse
+    close_gaps -- butt kept substrips against each other instead of leaving cut frames empty
+    """
+    if not strip or strip.type not in cuttable_types or interval < 1:
+        return []
+    duration = strip.frame_final_duration
+    kept = checker_intervals(duration, interval=interval, is_odd=is_odd)
+    if not kept:
+        return []
+
+    # place each kept group where it was or packed one after another
+    start_frame = strip.frame_final_start
+    frames = []
+    packed_frame = start_frame
+    for offset, length in kept:
+        frames.append(packed_frame if close_gaps else start_frame + offset)
+        packed_frame += length
+
+    # soft cut the original strip down to the first kept group before creating the
+    # rest, so no substrip overlaps it and gets shuffled into another channel
+    source_start = strip.frame_offset_start
+    first_offset, first_length = kept[0]
+    strip.frame_offset_end += duration - first_offset - first_length
+    strip.frame_offset_start += first_offset
+    strip.frame_start += frames[0] - strip.frame_final_start
+
+    # later substrips read the source from the original's unchanged animation offset
     strips = [strip]
-    checker_cut = is_odd    # T to cut even substrips, F for odd
-    print("There are {0} substrips to checker cut".format(substrip_count))
-
-    channel = strip.channel
-
-    for i in range(substrip_count):
-        activate_lone_strip(strip)
-
-        # move ahead interval frames
-        bpy.context.scene.frame_current += interval
-
-        # copy strip as first strip
-        substrip = duplicate_strip(strip)
-        strips.append(substrip)
-
-        # cut first strip along interval
-        strip.frame_start = bpy.context.scene.frame_current - interval
-        substrip.frame_final_duration = bpy.context.scene.frame_current - substrip.frame_start
-
-        # offset internal animation for frames
-        strip.animation_offset_start += interval
-        strip.frame_start += interval
-
-        # place in channel now that strips are cut
-        strip.channel = channel
-        substrip.channel = channel
-
-        # remove second strip
-        checker_cut and run_sequencer_op(bpy.ops.sequencer.delete)
-        checker_cut = not checker_cut
-
-        deselect_strips()
-        continue
+    for (offset, length), frame in zip(kept[1:], frames[1:]):
+        strips.append(new_substrip(strip, source_start + offset, length, frame))
 
     return strips
 
-def handle_strip_cuts(strips=[], use_selected=True):
-    """Handler method for checker cutting either one or multiple strips"""
-    if not strips and not use_selected:
+def find_strips(pattern=None, use_selected=True):
+    """List top-level strips matching a name regex and optionally only selected ones"""
+    r_name = re.compile(pattern) if pattern else None
+    return [
+        strip for strip in bpy.context.scene.sequence_editor.sequences
+        if (not use_selected or strip.select) and (r_name is None or r_name.search(strip.name))
+    ]
+
+def handle_strip_cuts(strips=[], use_selected=True, pattern=None, interval=1, is_odd=False, close_gaps=False, group=None):
+    """Handler method for checker cutting either one or multiple strips
+
+    Strips are cut frame by frame unless group is set (or, left unset, more than one
+    strip is selected without a name pattern), in which case every other strip goes.
+    """
+    if not strips and not use_selected and not pattern:
         return
-    if use_selected:
-        strips = [strip for strip in bpy.context.scene.sequence_editor.sequences if strip.select]
-    if len(strips) == 1:
-        every_other_frame_cut(bpy.context.scene.sequence_editor.active_strip, interval=3)
-    elif len(strips) > 1:
-        every_other_group_cut(bpy.context.scene.sequence_editor.sequences)
-    return strips
+    bpy.context.scene.sequence_editor_create()
+    if use_selected or pattern:
+        strips = find_strips(pattern=pattern, use_selected=use_selected)
+    if group is None:
+        group = len(strips) > 1 and not pattern
+    if group:
+        return every_other_group_cut(strips, is_odd=is_odd)
+    resulting_strips = []
+    for strip in strips:
+        resulting_strips += every_other_cut(strip, interval=interval, is_odd=is_odd, close_gaps=close_gaps)
+    print("Every Other Cutter - kept {0} substrips from {1} strips".format(len(resulting_strips), len(strips)))
+    return resulting_strips
+
+def parse_args(argv=sys.argv):
+    """Read checker cut options passed after -- on the Blender command line"""
+    argv = argv[argv.index('--') + 1:] if '--' in argv else []
+    parser = argparse.ArgumentParser(description="Checker cut sequencer strips")
+    parser.add_argument('--pattern', default=None, help="regex matching names of strips to cut (default: selected strips)")
+    parser.add_argument('--interval', type=int, default=1, help="frames in each kept or cut group")
+    parser.add_argument('--odd', action='store_true', help="keep odd frame groups instead of even ones")
+    parser.add_argument('--close-gaps', action='store_true', help="pack kept substrips together")
+    parser.add_argument('--groups', action='store_true', help="cut every other strip instead of every other frame group")
+    parser.add_argument('--save', action='store_true', help="save the .blend after cutting")
+    return parser.parse_args(argv)
 
 # run checker cut handler
-handle_strip_cuts()
+if __name__ == '__main__':
+    args = parse_args()
+    handle_strip_cuts(
+        use_selected=args.pattern is None,
+        pattern=args.pattern,
+        interval=args.interval,
+        is_odd=args.odd,
+        close_gaps=args.close_gaps,
+        group=args.groups or None
+    )
+    args.save and bpy.ops.wm.save_mainfile()
@@ -1,16 +1,15 @@
 #!/usr/bin/python
+import time
 import bpy
 from bpy.props import IntProperty
+from strip_index import get_strip_index
 
 # Blender Python extension by Joshua (GitHub user Botmasher)
-# Input: a single selected sequence strip
+# Input: one or more selected sequence strips
 # Output: one hard cut and lengthened strip for each framestep in the input
 
 # TODO cases where trail or gap is negative (correctly deal with dominoing start_frames)
 
-# TODO another strip in same channel to the right of active split strip
-# 	- note the option to select strips to the L/R in ops
-
 # TODO handle no strip selected
 
 # TODO allow selected set of strips to be uniformly lengthened/shortened
@@ -52,14 +51,59 @@ def config_frame_splitter_props():
 	]
 	return frame_splitter_props_data
 
+# strip types new_substrip can rebuild from their source media
+substrip_types = ('IMAGE', 'MOVIE', 'SOUND')
+
+def new_substrip(strip, source_offset, length, frame_start, channel=None):
+	"""Create a strip showing length source frames of strip starting source_offset frames into it
+
+	Builds the substrip through sequences.new_* instead of duplicating and trimming.
+	"""
+	sequences = bpy.context.scene.sequence_editor.sequences
+	channel = strip.channel if channel is None else channel
+	if strip.type == 'IMAGE':
+		elements = strip.elements
+		first = min(strip.animation_offset_start + source_offset, len(elements) - 1)
+		last = min(first + length, len(elements))
+		substrip = sequences.new_image(name=strip.name, filepath="{0}{1}".format(strip.directory, elements[first].filename), channel=channel, frame_start=frame_start)
+		for i in range(first + 1, last):
+			substrip.elements.append(elements[i].filename)
+	elif strip.type in ('MOVIE', 'SOUND'):
+		if strip.type == 'MOVIE':
+			substrip = sequences.new_movie(name=strip.name, filepath=strip.filepath, channel=channel, frame_start=frame_start)
+		else:
+			substrip = sequences.new_sound(name=strip.name, filepath=strip.sound.filepath, channel=channel, frame_start=frame_start)
+		# hard cut the source down to the substrip frames
+		source_length = substrip.frame_duration
+		substrip.animation_offset_start = strip.animation_offset_start + source_offset
+		substrip.animation_offset_end = max(source_length - substrip.animation_offset_start - length, 0)
+		substrip.frame_start = frame_start
+		# the full length source may have been shuffled out of the channel before trimming
+		substrip.channel != channel and setattr(substrip, 'channel', channel)
+	else:
+		raise Exception("Unable to create substrip for {0} strip {1}".format(strip.type, strip.name))
+	# carry over how the strip blends and sounds
+	for attr in ('blend_type', 'blend_alpha', 'volume'):
+		hasattr(strip, attr) and hasattr(substrip, attr) and setattr(substrip, attr, getattr(strip, attr))
+	return substrip
+
 class FrameSplitter:
 	def __init__(self):
 		return
 
-	def gap_push_strip(self, sequence, gap):
+	def gap_push_strip(self, sequence, gap, index=None):
 		"""Insert a gap after the strip and push all subsequent strips ahead"""
-		bpy.context.scene.frame_current = sequence.frame_start + 1
-		bpy.ops.sequencer.gap_insert(frames=gap)
+		index = get_strip_index(rebuild=True) if index is None else index
+		sequences = bpy.context.scene.sequence_editor.sequences_all
+		frame = sequence.frame_start + 1
+		# gather strips right of the frame in every channel like gap_insert does
+		pushed = []
+		for channel in index.channels:
+			pushed += [sequences[name] for name in index.right_of(channel, frame)]
+		# move latest strips first so none lands on a strip still waiting to move
+		for strip in sorted(pushed, key=lambda s: s.frame_final_start, reverse=True):
+			strip.frame_start += gap
+			index.update(strip)
 		return sequence
 
 	def move_strip(self, sequence, offset):
@@ -85,7 +129,7 @@ class FrameSplitter:
 		sequence.frame_final_duration = step
 		return sequence
 
-	def subcut_strip(self, s, step=0, trail=0, gap=0):
+	def subcut_strip(self, s, step=0, trail=0, gap=0, index=None):
 		"""Cut a sequencer strip into uniformly stepped and spaced substrips.
 
 		Arguments:
@@ -93,21 +137,14 @@ class FrameSplitter:
 		step -- the number of frames counted between hard cuts
 		trail -- the left or right hand lengthening in frames applied to each substrip
 		gap -- the empty space in frames to leave between each substrip
+		index -- shared strip index used to push later strips in the channel out of the way
 		"""
-		# remember starting playhead position
-		playhead_frame = bpy.context.scene.frame_current
+		index = get_strip_index(rebuild=True) if index is None else index
 
 		# store bounding strip frames
-		start_frame = s.frame_start
+		start_frame = s.frame_final_start
 		end_frame = start_frame + s.frame_final_duration
 
-		# store and set playhead position
-		bpy.context.scene.frame_current = start_frame
-
-		# select only the active strip
-		for sequence in bpy.context.scene.sequence_editor.sequences_all: sequence.select = False
-		s.select = True
-
 		# calculate how many strips will be produced (proportional to number of cuts)
 		frames = range(start_frame+1, end_frame)
 		cuts_count = 0 if not step else len(list(frames)) / step
@@ -120,38 +157,55 @@ class FrameSplitter:
 		else:
 			cuts_count = int(cuts_count) + 1
 
-		# cut into substrips and create list of subcut strips
-		resulting_strips = []
-		current_strip = s
-
-		# make planned cuts following step and stretch values
-		for cut in range(cuts_count):
-			current_strip.select = True
-			last_strip = current_strip
-
-			# shrink original strip
-			if cut == 0:
-				s.animation_offset_end += s.frame_final_duration - step
-			# cut subsequent strips
-			else:
-				bpy.context.scene.frame_current += step
-				bpy.ops.sequencer.duplicate()
-				current_strip = bpy.context.scene.sequence_editor.active_strip
-				self.move_strip(current_strip, bpy.context.scene.frame_current + ((trail + gap) * cut))
-				self.cut_anim_substrip(current_strip, step)
-
-			self.extend_strip(current_strip, trail)
-
-			resulting_strips.append(current_strip)
-
-			last_strip.select = False
-
-		# return playhead to original frame
-		bpy.context.scene.frame_current = playhead_frame
+		# precompute each substrip's source offset, length and timeline start
+		source_start = s.frame_offset_start
+		cuts = [(
+			source_start + step * cut,
+			min(step, s.frame_final_duration - step * cut),
+			start_frame + (step + trail + gap) * cut
+		) for cut in range(cuts_count)]
+
+		# push later strips in this channel past the end of the last substrip
+		growth = cuts[-1][2] + cuts[-1][1] + trail - end_frame
+		if growth > 0:
+			sequences = bpy.context.scene.sequence_editor.sequences_all
+			for name in reversed(index.right_of(s.channel, end_frame)):
+				sequences[name].frame_start += growth
+				index.update(sequences[name])
+
+		# shrink original strip into the first substrip before creating the rest, so no
+		# substrip overlaps it and gets shuffled into another channel
+		# (the animation start offset is unchanged, so the source offsets still hold)
+		s.animation_offset_end += s.frame_final_duration - step
+		self.extend_strip(s, trail)
+		index.update(s)
+
+		resulting_strips = [s]
+		for source_offset, length, frame in cuts[1:]:
+			substrip = new_substrip(s, source_offset, length, frame)
+			self.extend_strip(substrip, trail)
+			index.add(substrip)
+			resulting_strips.append(substrip)
 
 		# list of cut strips
 		return resulting_strips
 
+	def subcut_strips(self, strips, step=0, trail=0, gap=0):
+		"""Subcut many strips at once, reporting throughput in substrips per second"""
+		index = get_strip_index(rebuild=True)
+		timer = time.time()
+		# work from the latest strip back so pushing strips never moves one still to be cut
+		resulting_strips = [
+			self.subcut_strip(s, step=step, trail=trail, gap=gap, index=index)
+			for s in sorted(strips, key=lambda s: s.frame_final_start, reverse=True)
+		]
+		elapsed = time.time() - timer
+		substrips_count = sum(len(substrips) for substrips in resulting_strips)
+		print("Frame Splitter - {0} substrips from {1} strips in {2:.3f}s ({3:.0f} substrips/s)".format(
+			substrips_count, len(strips), elapsed, substrips_count / elapsed if elapsed else float('inf')
+		))
+		return resulting_strips
+
 class FrameSplitterPanel(bpy.types.Panel):
 	bl_label = "Frame Splitter"
 	bl_idname = "strip.frame_splitter_panel"
@@ -170,7 +224,7 @@ class FrameSplitterPanel(bpy.types.Panel):
 class FrameSplitterOperator(bpy.types.Operator):
 	bl_idname = "strip.frame_splitter"
 	bl_label = "Frame Splitter Button"
-	bl_description = "Split sequence frames into new substrips"
+	bl_description = "Split frames of the selected sequences into new substrips"
 	bl_options = {'REGISTER', 'UNDO'}
 
 	@classmethod
@@ -183,7 +237,9 @@ class FrameSplitterOperator(bpy.types.Operator):
 		step = strip.frame_splitter_step
 		trail = strip.frame_splitter_trail
 		gap = strip.frame_splitter_gap
-		scene.sequence_editor.frame_splitter.subcut_strip(strip, step, trail, gap)
+		strips = [s for s in scene.sequence_editor.sequences if s.select and s.type in ('IMAGE', 'MOVIE')]
+		strip not in strips and strips.append(strip)
+		scene.sequence_editor.frame_splitter.subcut_strips(strips, step, trail, gap)
 		return {'FINISHED'}
 
 def register():
@@ -0,0 +1,103 @@
+import struct
+
+## Image Headers
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Read width, height, channel count and alpha from PNG, JPEG and TIFF headers in
+## pure Python, touching only the first bytes of each file. Lets strip loaders size
+## images without rendering them or loading pixels, and works in background mode.
+##
+## NOTE returns None for unsupported or unreadable files
+
+png_signature = b'\x89PNG\r\n\x1a\n'
+
+# PNG colour type -> (channels, has alpha)
+png_color_types = {0: (1, False), 2: (3, False), 3: (3, False), 4: (2, True), 6: (4, True)}
+
+# JPEG start of frame markers holding the image size (every SOFn but DHT, JPG and DAC)
+jpeg_frame_markers = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def image_info(width, height, channels, alpha):
+    return {'width': width, 'height': height, 'channels': channels, 'alpha': alpha}
+
+def read_png(f, head):
+    """Read the IHDR chunk right after the PNG signature"""
+    if len(head) < 26 or head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+    channels, alpha = png_color_types.get(head[25], (3, False))
+    # palette images get alpha from a tRNS chunk before the image data
+    if head[25] == 3:
+        f.seek(33)
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8 or chunk[4:8] in (b'IDAT', b'IEND'):
+                break
+            if chunk[4:8] == b'tRNS':
+                channels, alpha = (4, True)
+                break
+            f.seek(struct.unpack('>I', chunk[:4])[0] + 4, 1)
+    return image_info(width, height, channels, alpha)
+
+def read_jpeg(f):
+    """Walk JPEG segments until the start of frame that holds the size"""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        # skip fill bytes between segments
+        while marker[1] == 0xFF:
+            marker = marker[1:] + f.read(1)
+            # a file cut off inside the fill bytes
+            if len(marker) < 2:
+                return None
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker[1] in jpeg_frame_markers:
+            frame = f.read(6)
+            if len(frame) < 6:
+                return None
+            height, width, channels = struct.unpack('>HHB', frame[1:6])
+            return image_info(width, height, channels, False)
+        f.seek(struct.unpack('>H', length)[0] - 2, 1)
+
+def read_tiff(f, head):
+    """Read size and samples per pixel from the first TIFF image directory"""
+    order = '<' if head[:2] == b'II' else '>'
+    f.seek(struct.unpack(order + 'I', head[4:8])[0])
+    count_bytes = f.read(2)
+    if len(count_bytes) < 2:
+        return None
+    count = struct.unpack(order + 'H', count_bytes)[0]
+    entries = f.read(12 * count)
+    tags = {}
+    for i in range(len(entries) // 12):
+        tag, kind, values = struct.unpack(order + 'HHI', entries[i * 12:i * 12 + 8])
+        # SHORT values sit left aligned in the 4 byte value field
+        if kind == 3:
+            tags[tag] = struct.unpack(order + 'H', entries[i * 12 + 8:i * 12 + 10])[0]
+        else:
+            tags[tag] = struct.unpack(order + 'I', entries[i * 12 + 8:i * 12 + 12])[0]
+    if 256 not in tags or 257 not in tags:
+        return None
+    channels = tags.get(277, 1)
+    # ExtraSamples marks an alpha channel
+    return image_info(tags[256], tags[257], channels, 338 in tags)
+
+def read_image_header(path):
+    """Get width, height, channels and alpha of a PNG, JPEG or TIFF from its header"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(png_signature):
+                return read_png(f, head)
+            if head[:2] == b'\xff\xd8':
+                return read_jpeg(f)
+            if head[:4] in (b'II*\x00', b'MM\x00*'):
+                return read_tiff(f, head)
+    except (OSError, struct.error):
+        pass
+    return None
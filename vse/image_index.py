@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import bpy
+from image_headers import read_image_header
+
+## Image Index
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Persistent index of image metadata shared by the image loaders. Maps each image
+## path to its mtime, size, width, height, channels and alpha, read from file
+## headers, and groups numbered files into image sequences with frame counts.
+## Directory trees are walked with os.scandir and only new or changed files have
+## their headers read, so a reopened project looks images up without touching them.
+##
+## NOTE the index is saved as image_index.json next to the .blend (or in the temp
+## directory for unsaved files)
+
+image_extensions = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+# name0001.png -> ('name', '0001', '.png')
+numbered_name = re.compile(r'^(.*?)(\d+)(\.[^.]+)$')
+
+def default_index_path(filename='image_index.json'):
+    """Keep the index next to the saved .blend, or in the temp directory for unsaved files"""
+    if bpy.data.filepath:
+        return bpy.path.abspath("//{0}".format(filename))
+    return os.path.join(tempfile.gettempdir(), filename)
+
+def scan_images(directory, recursive=True):
+    """List (path, stat) for every image file under a directory using os.scandir"""
+    found = []
+    folders = [directory]
+    while folders:
+        try:
+            entries = list(os.scandir(folders.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                recursive and folders.append(entry.path)
+            elif entry.name.lower().endswith(image_extensions):
+                found.append((os.path.abspath(entry.path), entry.stat()))
+    return found
+
+def sequence_key(path):
+    """Name shared by every frame of a numbered image sequence, like dir/name####.png"""
+    directory, filename = os.path.split(path)
+    match = numbered_name.match(filename)
+    if not match:
+        return None
+    prefix, number, extension = match.groups()
+    return os.path.join(directory, "{0}{1}{2}".format(prefix, '#' * len(number), extension))
+
+class ImageIndex:
+    def __init__(self, path=None):
+        self.path = default_index_path() if path is None else path
+        # image path -> {'mtime', 'size', 'width', 'height', 'channels', 'alpha'}
+        self.images = {}
+        # sequence key -> {'first', 'last', 'frames'}
+        self.sequences = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        """Read the index from disk if an index file exists"""
+        if os.path.isfile(self.path):
+            with open(self.path, 'r') as index_file:
+                data = json.load(index_file)
+            self.images = data.get('images', {})
+            self.sequences = data.get('sequences', {})
+        return self
+
+    def save(self):
+        """Write the index to disk if anything was read since loading"""
+        if not self.changed:
+            return
+        with open(self.path, 'w') as index_file:
+            json.dump({'images': self.images, 'sequences': self.sequences}, index_file)
+        self.changed = False
+
+    def is_current(self, path, stat):
+        entry = self.images.get(path)
+        return entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size
+
+    def refresh(self, files, workers=8):
+        """Read headers for (path, stat) pairs that are new or changed, on a thread pool"""
+        stale = [(path, stat) for path, stat in files if not self.is_current(path, stat)]
+        if not stale:
+            return 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            headers = list(pool.map(read_image_header, [path for path, stat in stale]))
+        for (path, stat), header in zip(stale, headers):
+            entry = {'mtime': stat.st_mtime, 'size': stat.st_size}
+            entry.update(header or {'width': 0, 'height': 0, 'channels': 0, 'alpha': False})
+            self.images[path] = entry
+        self.changed = True
+        return len(stale)
+
+    def scan(self, directory, recursive=True, workers=8):
+        """Index every image under a directory, reading only new or changed files"""
+        files = scan_images(bpy.path.abspath(directory), recursive=recursive)
+        read = self.refresh(files, workers=workers)
+        # regroup sequences from file names, which costs nothing to redo
+        sequences = {}
+        for path, stat in files:
+            key = sequence_key(path)
+            if key is None:
+                continue
+            number = int(numbered_name.match(os.path.basename(path)).group(2))
+            sequence = sequences.setdefault(key, {'first': number, 'last': number, 'frames': 0})
+            sequence['first'] = min(sequence['first'], number)
+            sequence['last'] = max(sequence['last'], number)
+            sequence['frames'] += 1
+        if any(self.sequences.get(key) != sequence for key, sequence in sequences.items()):
+            self.sequences.update(sequences)
+            self.changed = True
+        self.save()
+        print("image_index - scanned {0} images under {1}, read {2} headers".format(len(files), directory, read))
+        return files
+
+    def infos(self, paths, workers=8):
+        """Get metadata for a list of image paths, reading headers only for uncached files"""
+        paths = [os.path.abspath(bpy.path.abspath(path)) for path in paths]
+        files = []
+        for path in paths:
+            try:
+                files.append((path, os.stat(path)))
+            except OSError:
+                continue
+        self.refresh(files, workers=workers)
+        self.save()
+        return [self.images.get(path) for path in paths]
+
+    def info(self, path):
+        """Get metadata for one image path, or None if the file is missing"""
+        return self.infos([path])[0]
+
+    def sequence(self, path):
+        """Get first and last frame numbers and frame count of the sequence an image belongs to"""
+        key = sequence_key(os.path.abspath(bpy.path.abspath(path)))
+        return self.sequences.get(key) if key else None
+
+# one index shared by every loader in the session
+image_index = None
+
+def get_image_index():
+    """Return the shared image index, loading it on first use"""
+    global image_index
+    if image_index is None:
+        image_index = ImageIndex()
+    return image_index
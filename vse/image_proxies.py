@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+## Image Proxies
+##
+## Blender Python VSE worker by Joshua R (GitHub user Botmasher)
+##
+## Downsample image sequence frames to JPEG proxies in parallel worker processes.
+## Plain Python with Pillow and no bpy, so proxy_builder.py runs it with Blender's
+## bundled Python (bpy.app.binary_path_python) where process pools work normally:
+##
+##   python image_proxies.py jobs.json
+##
+## jobs.json holds {"quality": 90, "jobs": [[source, [[percent, target], ...]], ...]}
+## and one "done <written> <skipped>" line is printed as each source frame finishes.
+
+def is_current(source, target):
+    """Check a proxy exists and is newer than the frame it was made from"""
+    return os.path.isfile(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+def build_proxies(job, quality=90):
+    """Write each out of date proxy size of one source frame, returning (written, skipped)"""
+    source, targets = job
+    stale = [(percent, target) for percent, target in targets if not is_current(source, target)]
+    if not stale:
+        return (0, len(targets))
+    image = Image.open(source)
+    image = image.convert('RGB')
+    for percent, target in stale:
+        size = (max(image.size[0] * percent // 100, 1), max(image.size[1] * percent // 100, 1))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        image.resize(size, Image.BILINEAR).save(target, 'JPEG', quality=quality)
+    return (len(stale), len(targets) - len(stale))
+
+def run_jobs(jobs, quality=90, workers=None):
+    """Build proxies for every job across a process pool, printing progress as frames finish"""
+    written = 0
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # group frames into chunks so workers are not fed one tiny job at a time
+        results = pool.map(build_proxies, jobs, [quality] * len(jobs), chunksize=max(len(jobs) // 64, 1))
+        for job_written, job_skipped in results:
+            written += job_written
+            skipped += job_skipped
+            print("done {0} {1}".format(job_written, job_skipped), flush=True)
+    return (written, skipped)
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'r') as jobs_file:
+        settings = json.load(jobs_file)
+    timer = time.time()
+    written, skipped = run_jobs(settings['jobs'], quality=settings.get('quality', 90), workers=settings.get('workers'))
+    print("image_proxies - wrote {0} and skipped {1} proxies in {2:.2f}s".format(written, skipped, time.time() - timer), flush=True)
@@ -1,6 +1,9 @@
 #!/usr/bin/python
+import json
+import hashlib
 import bpy
 import bpy.props
+from bpy.app.handlers import persistent
 
 ## NLE Maskomatic
 ## by GitHub user Botmasher (Joshua R)
@@ -8,58 +11,218 @@ import bpy.props
 ## Set up a basic mask and mask modifier for a single sequence editor strip.
 ##
 
-# TODO apply mask to array of selected strips
-# TODO more custom shapes (poly?) when configuring the mask strip
+## Masks are built straight through bpy.data.masks with computed spline points, so no
+## clip editor or movie clip is needed and it runs headless. Masks live in a pool keyed
+## by their content (shape, resolution, invert and frame range) so strips asking for the
+## same mask share one datablock. Pooled masks no strip uses any more are freed after
+## strips are deleted (from depsgraph_update_post in 2.8, scene_update_post before it,
+## both only counting strips until the count drops) or through the Free Unused Masks
+## button.
+##
+
 # TODO custom loc, scale when configuring the mask strip
 # TODO load / ask which clip file will be masked over
 # 	- should mask-adjusted movie clip data be considered part of the mask model?
 
-def add_mask(strip, name, start_frame=0, end_frame=0, shape=None, invert=False):
-	"""Create a mask and mask modifier for one sequence
+# strip types that take a mask modifier
+maskable_types = ['IMAGE', 'MOVIE']
 
-	Return a mask model mapping to both the mask modifier and the mask strip
+# bezier handle length for a quarter circle arc
+circle_handle = 0.5522847498
+
+def shape_points(shape, center=(0.5, 0.5), size=0.5, aspect=1.0, points=None):
+	"""Compute (co, handle_left, handle_right) for each point of a mask shape
+
+	Coordinates are in mask space (0-1 across the frame). Aspect is the frame's width over
+	its height, used to keep squares and circles from stretching.
+	Arguments:
+	shape -- "square", "circle" or "custom" to trace the (x, y) points given in points
+	size -- width of the shape relative to the frame width
 	"""
-	if strip.type not in ['IMAGE', 'MOVIE']: return None
-
-	# setup mask strip (MovieClip Editor settings)
-	if len(bpy.data.movieclips) < 1: return None
-	mask_strip = bpy.data.masks.new(name)
-	# mask length
-	mask_strip.frame_start = start_frame
-	mask_strip.frame_end = end_frame
-
-	initial_area = bpy.context.area.type
-	bpy.context.area.type = "CLIP_EDITOR"
-	# movie clip configuration for cutting and placement of masked strip
-	bpy.context.area.spaces.active.clip = bpy.data.movieclips[0]
-	bpy.context.area.spaces.active.mode = "MASK"
-	bpy.context.area.spaces.active.mask = mask_strip
-	bpy.context.area.spaces.active.clip.frame_start = strip.frame_start
-	bpy.context.area.spaces.active.clip.frame_offset = strip.animation_offset_start
-	# mask geometry
-	if shape == "circle" or shape == "square":
-		# TODO set to movie clip height and width
-		res_h = bpy.context.scene.render.resolution_x
-		res_w = bpy.context.scene.render.resolution_y
-		mask_primitive_add = getattr(bpy.ops.mask, "primitive_%s_add" % shape)
-		mask_primitive_add(size=res_h, location=(res_w * 0.25, res_h * 0.5))
-	else:
-		# zeroth layer automatically added above with primitive
-		mask_strip.layers.new()
-	mask_strip.layers[0].invert = invert
+	cx, cy = center
+	rx = size / 2.0
+	ry = rx * aspect
+	if shape == "square":
+		corners = [(cx - rx, cy - ry), (cx + rx, cy - ry), (cx + rx, cy + ry), (cx - rx, cy + ry)]
+		return [(co, co, co) for co in corners]
+	if shape == "circle":
+		# four points on the axes with handles tangent to the circle
+		traced = []
+		for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+			co = (cx + dx * rx, cy + dy * ry)
+			# tangent running counterclockwise
+			tx, ty = (-dy * rx * circle_handle, dx * ry * circle_handle)
+			traced.append((co, (co[0] - tx, co[1] - ty), (co[0] + tx, co[1] + ty)))
+		return traced
+	if shape == "custom" and points:
+		return [(tuple(co), tuple(co), tuple(co)) for co in points]
+	return []
+
+def build_mask(name, shape_data, start_frame=0, end_frame=0, invert=False, handle_type='VECTOR'):
+	"""Create a mask datablock with one layer and one cyclic spline through the shape points"""
+	mask = bpy.data.masks.new(name)
+	mask.frame_start = start_frame
+	mask.frame_end = end_frame
+	layer = mask.layers.new(name)
+	layer.invert = invert
+	if shape_data:
+		spline = layer.splines.new()
+		spline.use_cyclic = True
+		# a new spline starts with one point
+		spline.points.add(len(shape_data) - 1)
+		for point, (co, handle_left, handle_right) in zip(spline.points, shape_data):
+			point.co = co
+			point.handle_left_type = handle_type
+			point.handle_right_type = handle_type
+			point.handle_left = handle_left
+			point.handle_right = handle_right
+	return mask
 
-	# add modifier on the vse strip
+def attach_mask(strip, mask, name):
+	"""Add a mask modifier using mask to a strip and alpha over the result"""
 	mask_modifier = strip.modifiers.new(name, type="MASK")
 	mask_modifier.input_mask_type = "ID"
-	mask_modifier.input_mask_id = mask_strip
+	mask_modifier.input_mask_id = mask
 	strip.blend_type = "ALPHA_OVER"
 	strip.blend_alpha = 1.0
+	return mask_modifier
 
-	mask = {'modifier': mask_modifier, 'strip': mask_strip}
+def render_aspect():
+	render = bpy.context.scene.render
+	return (render.resolution_x * render.pixel_aspect_x) / float(render.resolution_y * render.pixel_aspect_y)
 
-	bpy.context.area.type = initial_area
+# rough bytes held (and saved to the .blend) by a mask datablock and each spline point
+mask_base_bytes = 1536
+mask_point_bytes = 112
 
-	return mask
+def mask_bytes(mask):
+	"""Estimate the memory a mask datablock takes"""
+	points = sum(len(spline.points) for layer in mask.layers for spline in layer.splines)
+	return mask_base_bytes + points * mask_point_bytes
+
+class MaskPool:
+	"""Content addressed masks shared between strips, with a count of strips using each"""
+	def __init__(self):
+		# content key -> mask name, filled from the custom property on pooled masks
+		self.masks = {}
+		# content key -> number of mask modifiers and mask strips using the mask
+		self.users = {}
+		self.reused = 0
+		self.saved_bytes = 0
+		# strips seen when users were last counted, to spot deletions cheaply
+		self.strip_count = None
+
+	def key(self, shape_data, invert, start_frame, end_frame):
+		"""Hash everything that shapes a mask into one content key"""
+		render = bpy.context.scene.render
+		content = {
+			'points': [[[round(c, 6) for c in co] for co in point] for point in shape_data],
+			'resolution': [render.resolution_x, render.resolution_y],
+			'invert': invert,
+			'frames': [start_frame, end_frame]
+		}
+		return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+	def find(self, key):
+		"""Get the pooled mask for a key, rescanning masks loaded from the .blend if needed"""
+		name = self.masks.get(key)
+		mask = bpy.data.masks.get(name) if name else None
+		if mask is not None and mask.get("maskomatic_key") == key:
+			return mask
+		self.masks = {m["maskomatic_key"]: m.name for m in bpy.data.masks if "maskomatic_key" in m}
+		return bpy.data.masks.get(self.masks[key]) if key in self.masks else None
+
+	def acquire(self, key, build):
+		"""Reuse the mask for a key or build and pool it, counting one more user"""
+		mask = self.find(key)
+		if mask is None:
+			mask = build()
+			mask["maskomatic_key"] = key
+			self.masks[key] = mask.name
+		else:
+			self.reused += 1
+			self.saved_bytes += mask_bytes(mask)
+		self.users[key] = self.users.get(key, 0) + 1
+		return mask
+
+	def count_users(self):
+		"""Recount mask modifiers and mask strips using each pooled mask across every scene"""
+		users = {}
+		strip_count = 0
+		for scene in bpy.data.scenes:
+			if not scene.sequence_editor:
+				continue
+			for strip in scene.sequence_editor.sequences_all:
+				strip_count += 1
+				# a mask strip showing a pooled mask uses it as much as a modifier does
+				masks = [strip.mask] if strip.type == 'MASK' else []
+				masks += [modifier.input_mask_id for modifier in strip.modifiers if modifier.type == 'MASK']
+				for mask in masks:
+					if mask is not None and "maskomatic_key" in mask:
+						users[mask["maskomatic_key"]] = users.get(mask["maskomatic_key"], 0) + 1
+		self.users = users
+		self.strip_count = strip_count
+		return users
+
+	def free_orphans(self):
+		"""Remove pooled masks no strip uses any more, returning how many were freed"""
+		users = self.count_users()
+		orphans = [mask for mask in bpy.data.masks if "maskomatic_key" in mask and not users.get(mask["maskomatic_key"])]
+		for mask in orphans:
+			self.masks.pop(mask["maskomatic_key"], None)
+			bpy.data.masks.remove(mask)
+		return len(orphans)
+
+	def report(self):
+		return "Mask pool - {0} pooled masks, {1} reuses saved about {2:.1f} KB".format(len(self.masks), self.reused, self.saved_bytes / 1024.0)
+
+mask_pool = MaskPool()
+
+def current_strip_count():
+	return sum(len(scene.sequence_editor.sequences_all) for scene in bpy.data.scenes if scene.sequence_editor)
+
+@persistent
+def free_orphan_masks(scene, depsgraph=None):
+	"""Scene or depsgraph update handler freeing pooled masks once strips have been deleted
+
+	Runs on every update, so it only sums strip counts unless the count has dropped.
+	"""
+	if mask_pool.strip_count is None or current_strip_count() < mask_pool.strip_count:
+		freed = mask_pool.free_orphans()
+		freed and print("maskomatic - freed {0} unused masks".format(freed))
+	else:
+		mask_pool.strip_count = current_strip_count()
+
+def add_masks(strips, name, start_frame=0, end_frame=0, shape=None, invert=False, points=None, center=(0.5, 0.5), size=0.5):
+	"""Create mask modifiers for many strips at once, building one mask per distinct geometry
+
+	Blank masks are built fresh for every strip and left out of the pool.
+
+	Return a list of mask models mapping to both the mask modifier and the mask strip
+	"""
+	aspect = render_aspect()
+	shape_data = shape_points(shape, center=center, size=size, aspect=aspect, points=points)
+	handle_type = 'ALIGNED' if shape == "circle" else 'VECTOR'
+	key = mask_pool.key(shape_data, invert, start_frame, end_frame)
+	build = lambda: build_mask(name, shape_data, start_frame=start_frame, end_frame=end_frame, invert=invert, handle_type=handle_type)
+	masks = []
+	for strip in strips:
+		if strip.type not in maskable_types:
+			continue
+		# blank masks get their points drawn by hand per strip, so never share them
+		mask_strip = mask_pool.acquire(key, build) if shape_data else build()
+		masks.append({'modifier': attach_mask(strip, mask_strip, name), 'strip': mask_strip})
+	mask_pool.strip_count = current_strip_count()
+	print("maskomatic - {0}".format(mask_pool.report()))
+	return masks
+
+def add_mask(strip, name, start_frame=0, end_frame=0, shape=None, invert=False):
+	"""Create a mask and mask modifier for one sequence
+
+	Return a mask model mapping to both the mask modifier and the mask strip
+	"""
+	masks = add_masks([strip], name, start_frame=start_frame, end_frame=end_frame, shape=shape, invert=invert)
+	return masks[0] if masks else None
 
 bpy.types.ImageSequence.maskomatic_name = bpy.props.StringProperty (
 	name = "Name",
@@ -110,6 +273,8 @@ class MaskomaticPanel(bpy.types.Panel):
 		row = self.layout.row()
 		row.prop(strip, "maskomatic_invert")
 		self.layout.column().operator("strip.maskomatic_operator", text="Mask this strip")
+		self.layout.column().operator("strip.maskomatic_batch_operator", text="Mask selected strips")
+		self.layout.column().operator("strip.maskomatic_free_operator", text="Free unused masks")
 
 class MaskomaticOperator(bpy.types.Operator):
 	bl_idname = "strip.maskomatic_operator"
@@ -131,10 +296,50 @@ class MaskomaticOperator(bpy.types.Operator):
 		add_mask(strip, start_frame=start_frame, name=name, end_frame=end_frame, shape=shape, invert=invert)
 		return {'FINISHED'}
 
+class MaskomaticBatchOperator(bpy.types.Operator):
+	bl_idname = "strip.maskomatic_batch_operator"
+	bl_label = "Maskomatic Batch Operator"
+	bl_description = "Mask every selected strip with the active strip's mask settings"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	def execute(self, ctx):
+		strip = bpy.context.scene.sequence_editor.active_strip
+		strips = [s for s in bpy.context.scene.sequence_editor.sequences if s.select]
+		masks = add_masks(
+			strips,
+			strip.maskomatic_name,
+			start_frame=strip.maskomatic_frame_start,
+			end_frame=strip.maskomatic_frame_end,
+			shape=strip.maskomatic_primitive,
+			invert=strip.maskomatic_invert
+		)
+		self.report({'INFO'}, "Masked {0} strips. {1}".format(len(masks), mask_pool.report()))
+		return {'FINISHED'}
+
+class MaskomaticFreeOperator(bpy.types.Operator):
+	bl_idname = "strip.maskomatic_free_operator"
+	bl_label = "Maskomatic Free Unused Masks"
+	bl_description = "Remove pooled masks no strip or mask modifier uses any more"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	def execute(self, ctx):
+		freed = mask_pool.free_orphans()
+		self.report({'INFO'}, "Freed {0} unused masks. {1}".format(freed, mask_pool.report()))
+		return {'FINISHED'}
+
+def update_handlers():
+	"""Handlers run after scene changes - depsgraph_update_post in 2.8, scene_update_post before it"""
+	if hasattr(bpy.app.handlers, 'depsgraph_update_post'):
+		return bpy.app.handlers.depsgraph_update_post
+	return bpy.app.handlers.scene_update_post
+
 def register():
 	bpy.utils.register_module(__name__)
+	update_handlers().append(free_orphan_masks)
 
 def unregister():
+	handlers = update_handlers()
+	free_orphan_masks in handlers and handlers.remove(free_orphan_masks)
 	bpy.utils.unregister_module(__name__)
 
 if __name__ == "__main__": register()
@@ -1,5 +1,6 @@
 import bpy
 from bpy.props import *
+from audio_features import normalize_volumes
 
 # TODO store prop of "default" vols before tool changes them
 original_vols = {}
@@ -12,6 +13,8 @@ class MassVolProperties (bpy.types.PropertyGroup):
     name = StringProperty(name="Contains", description = "Only set strips whose name contains this string.")
     selecting = BoolProperty(name="Only Set Selected")
     set_base = BoolProperty(name="Set Base Volumes")
+    normalize = BoolProperty(name="Normalize Loudness", description="Set volumes from measured audio loudness instead")
+    target_db = FloatProperty(name="Target dB", description="Loudness (dB RMS) to normalize volumes to", default=-20.0, max=0.0)
     def define_defaults(self):
         self.base = self.volume
         self.name = ''
@@ -57,6 +60,9 @@ class SetMassVolPanel (bpy.types.Panel):
             if active_s.massvol_props.set_base:
                 self.layout.row().prop(active_s.massvol_props, 'base')
             self.layout.row().prop(active_s.massvol_props, 'set_base')
+            self.layout.row().prop(active_s.massvol_props, 'normalize')
+            if active_s.massvol_props.normalize:
+                self.layout.row().prop(active_s.massvol_props, 'target_db')
             self.layout.row().prop(active_s.massvol_props, 'selecting')
             # input box for name_contains
             self.layout.row().prop(active_s.massvol_props, 'name')
@@ -83,6 +89,15 @@ class SetMassVolOp (bpy.types.Operator):
         if active_s.massvol_props.set_base:
             new_vol = active_s.massvol_props.base
         
+        # normalize loudness of matching strips from their decoded audio
+        if active_s.massvol_props.normalize:
+            strips = [s for s in bpy.context.scene.sequence_editor.sequences
+                if s.type == 'SOUND' and active_s.massvol_props.name in s.name
+                and active_s.massvol_props.selecting - s.select <= 0]
+            normalize_volumes(strips, target_db=active_s.massvol_props.target_db)
+            active_s.massvol_props.base = active_s.volume
+            return {'FINISHED'}
+
         # set sound strip volumes
         for s in bpy.context.scene.sequence_editor.sequences:
             # compare bools to filter all or just selected
@@ -0,0 +1,205 @@
+import re
+import csv
+import json
+import bpy
+from bpy.app.handlers import persistent
+
+## Strip Name Index
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Shared index of every strip in a scene by type, name tokens and source file path.
+## Edits only mark the index stale (from depsgraph_update_post, or scene_update_post
+## before 2.8) and the next query diffs it against sequences_all. Regex query results
+## are cached until something changes, so repeat lookups over thousands of strips
+## cost a dictionary read. Results can be exported to CSV or JSON.
+##
+## NOTE scene_update_post fires on every redraw before 2.8, so there the index is only
+## marked stale when the strip counts or the active strip change. Call refresh with
+## force=True after renaming or relinking strips other than the active one.
+
+# name tokens split on anything that is not a letter or digit
+token_split = re.compile(r'[^0-9a-z]+')
+
+# Blender's .001 style duplication suffix
+duplication_suffix = re.compile(r'\.\d{3}$')
+
+def strip_source_path(strip):
+    """Path of the media file a strip plays, or an empty string for effects"""
+    if strip.type == 'SOUND':
+        return strip.sound.filepath if strip.sound else ''
+    if strip.type == 'MOVIE':
+        return strip.filepath
+    if strip.type == 'IMAGE':
+        return "{0}{1}".format(strip.directory, strip.elements[0].filename) if len(strip.elements) else strip.directory
+    return ''
+
+def name_tokens(name):
+    """Lowercase words and numbers in a strip name, ignoring the duplication suffix"""
+    return set(token for token in token_split.split(duplication_suffix.sub('', name).lower()) if token)
+
+class StripNameIndex:
+    def __init__(self, scene):
+        self.scene_name = scene.name
+        # strip name -> (type, source path, tokens)
+        self.entries = {}
+        self.types = {}
+        self.tokens = {}
+        self.paths = {}
+        # names of strips not inside a meta strip
+        self.top_level = set()
+        # (pattern, types, exclude, top_level) -> matching names
+        self.results = {}
+        self.dirty = True
+        # cheap summary of the strips at the last refresh, see signature
+        self.seen = None
+
+    def _add(self, name, strip_type, path):
+        tokens = name_tokens(name)
+        self.entries[name] = (strip_type, path, tokens)
+        self.types.setdefault(strip_type, set()).add(name)
+        self.paths.setdefault(path, set()).add(name)
+        for token in tokens:
+            self.tokens.setdefault(token, set()).add(name)
+
+    def _remove(self, name):
+        strip_type, path, tokens = self.entries.pop(name)
+        self.types[strip_type].discard(name)
+        self.paths[path].discard(name)
+        for token in tokens:
+            self.tokens[token].discard(name)
+
+    def sequence_editor(self):
+        return bpy.data.scenes[self.scene_name].sequence_editor
+
+    def signature(self):
+        """Strip counts and active strip name, which change as strips are added, removed, grouped or renamed"""
+        sequence_editor = self.sequence_editor()
+        if not sequence_editor:
+            return None
+        active = sequence_editor.active_strip
+        return (len(sequence_editor.sequences_all), len(sequence_editor.sequences), active.name if active else None)
+
+    def refresh(self, force=False):
+        """Bring the index in line with the scene's strips if it was marked stale"""
+        if not (self.dirty or force):
+            return False
+        sequence_editor = self.sequence_editor()
+        current = {}
+        top_level = set()
+        if sequence_editor:
+            for strip in sequence_editor.sequences_all:
+                current[strip.name] = (strip.type, strip_source_path(strip))
+            top_level = set(strip.name for strip in sequence_editor.sequences)
+        changed = top_level != self.top_level
+        for name in [name for name in self.entries if name not in current]:
+            self._remove(name)
+            changed = True
+        for name, (strip_type, path) in current.items():
+            entry = self.entries.get(name)
+            if entry is not None and entry[:2] == (strip_type, path):
+                continue
+            entry is not None and self._remove(name)
+            self._add(name, strip_type, path)
+            changed = True
+        self.top_level = top_level
+        if changed:
+            self.results = {}
+        self.dirty = False
+        self.seen = self.signature()
+        return changed
+
+    def with_type(self, strip_type):
+        """Names of strips of one type"""
+        self.refresh()
+        return set(self.types.get(strip_type, ()))
+
+    def with_token(self, token):
+        """Names of strips whose name contains a whole word or number"""
+        self.refresh()
+        return set(self.tokens.get(token.lower(), ()))
+
+    def with_path(self, path):
+        """Names of strips playing a media file"""
+        self.refresh()
+        return set(self.paths.get(path, ()))
+
+    def find(self, pattern=None, types=None, exclude=None, top_level=False):
+        """Names of strips whose name matches a regex, optionally by type and minus an excluded regex
+
+        Results are cached by query until the strips change.
+        """
+        self.refresh()
+        key = (pattern, tuple(types) if types else None, exclude, top_level)
+        if key in self.results:
+            return self.results[key]
+        if types:
+            names = set()
+            for strip_type in types:
+                names |= self.types.get(strip_type, set())
+        else:
+            names = set(self.entries)
+        if top_level:
+            names &= self.top_level
+        if pattern:
+            r_name = re.compile(pattern)
+            names = set(name for name in names if r_name.search(name))
+        if exclude:
+            r_exclude = re.compile(exclude)
+            names = set(name for name in names if not r_exclude.search(name))
+        self.results[key] = frozenset(names)
+        return self.results[key]
+
+    def strips(self, names):
+        """Look up strips by name"""
+        sequences_all = self.sequence_editor().sequences_all
+        return [sequences_all[name] for name in names if name in sequences_all]
+
+    def rows(self, names):
+        """Name, type and source path of each named strip, sorted by name"""
+        return [{'name': name, 'type': self.entries[name][0], 'path': self.entries[name][1]} for name in sorted(names) if name in self.entries]
+
+    def export_csv(self, names, path):
+        """Write found strips to a CSV file"""
+        with open(bpy.path.abspath(path), 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=['name', 'type', 'path'])
+            writer.writeheader()
+            writer.writerows(self.rows(names))
+        return path
+
+    def export_json(self, names, path):
+        """Write found strips to a JSON file"""
+        with open(bpy.path.abspath(path), 'w') as json_file:
+            json.dump(self.rows(names), json_file, indent=2)
+        return path
+
+# one name index per scene shared by every strip finder
+name_indexes = {}
+
+@persistent
+def mark_name_indexes_dirty(scene, depsgraph=None):
+    """Update handler marking a scene's name index stale after the scene changes"""
+    index = name_indexes.get(scene.name)
+    if index is None:
+        return
+    if depsgraph is not None:
+        depsgraph.id_type_updated('SCENE') and setattr(index, 'dirty', True)
+    # strip edits do not tag the scene before 2.8 and this runs on every redraw, so compare
+    # a cheap signature of the strips instead of diffing them all
+    elif not index.dirty and index.signature() != index.seen:
+        index.dirty = True
+
+def update_handlers():
+    """Handlers run after data changes (depsgraph_update_post from 2.8 on)"""
+    if hasattr(bpy.app.handlers, 'depsgraph_update_post'):
+        return bpy.app.handlers.depsgraph_update_post
+    return bpy.app.handlers.scene_update_post
+
+def get_name_index(scene=None):
+    """Return the shared name index for a scene, starting to track edits on first use"""
+    scene = bpy.context.scene if scene is None else scene
+    handlers = update_handlers()
+    mark_name_indexes_dirty in handlers or handlers.append(mark_name_indexes_dirty)
+    if scene.name not in name_indexes:
+        name_indexes[scene.name] = StripNameIndex(scene)
+    return name_indexes[scene.name]
@@ -1,7 +1,12 @@
 #!/usr/bin/env python
+import os
+import sys
+import time
+import argparse
 import bpy
 from bpy.props import *
 from bpy_extras.io_utils import ImportHelper
+from image_index import get_image_index, sequence_key
 
 ## NOTE script deprecated! - the dedicated add-on project now lives at https://github.com/Botmasher/blender-vse-pretty-img
 
@@ -11,6 +16,14 @@ from bpy_extras.io_utils import ImportHelper
 ## This small Blender Python tool loads prettier images with transparency and original image
 ## dimensions instead of default settings and wonkily stretched/squashed dimensions
 ##
+## Image sizes come from file headers through the shared image index, so many images load
+## at once, reopened projects skip reading them again and it runs headless:
+##
+##   blender -b project.blend -P pretty_img.py -- img1.png img2.jpg --length 24 --save
+##
+## Folders passed in are scanned into the index and load every image inside them. With
+## --sequence each numbered frame loads its whole image sequence as one strip.
+##
 
 bl_info = {
     "name": "Pretty Image Loader",
@@ -25,75 +38,26 @@ bl_info = {
     "category": "VSE"
 }
 
-def load_scale_img (name, path, scale=1.0, channel=1, length=10, alpha=True):
-
-    scene = bpy.context.scene
-
-    scene.sequence_editor_create()
-    # create sequence editor
-
-    strip = scene.sequence_editor.sequences.new_image(name=name, filepath=path, channel=channel, frame_start=scene.frame_current)
-
-    def deselect_strips ():
-        bpy.ops.sequencer.select_all(action='DESELECT')
-        return
-
-    # TODO set channel strip wisely - currently importing many causes interlaced stacking of transform and image strips
-
-    deselect_strips()
-    strip.select = True
-    scene.sequence_editor.active_strip = strip
-
-    bpy.ops.sequencer.effect_strip_add(type='TRANSFORM')
-    transform_strip = scene.sequence_editor.active_strip
-    transform_strip.use_uniform_scale = False
-
-    # hack: update in viewport to read source img orig_width and orig_height
-    # switch view and area
-    area = bpy.context.area
-    original_area = area.type
-    area.type = 'SEQUENCE_EDITOR'
-    original_view = area.spaces[0].view_type
-    area.spaces[0].view_type = 'PREVIEW'
-    # NOTE playhead steps alone are sufficient when user has visible VSE Preview
-    frame_initial = scene.frame_current
-    scene.frame_current = strip.frame_start
-    bpy.ops.render.opengl(sequencer=True)
-    # reset view and area
-    area.spaces[0].view_type = original_view
-    area.type = original_area
-    # /hack
-
-    # gather image data
-    img = strip.elements[0]
-    # store dimensions
-
-    if not (img.orig_width and img.orig_height):
-        print("pretty_img - Failed to rescale img with width or height of 0: {0}".format(img.filename))
-        return
-
-    img_res = {
-        'w': img.orig_width,
-        'h': img.orig_height
-    }
-    print("%s: %s" % (img.filename, "{0} x {1}".format(img_res['w'], img_res['h'])))
-
-    # resize image
-    # figure out how to resize just using input dimensions, the stretch applied, transform scale
-    render_res = {'w': scene.render.resolution_x, 'h': scene.render.resolution_y}
-    img_render_ratio = {'w': img_res['w'] / render_res['w'], 'h': img_res['h'] / render_res['h']}
-    print("Image vs screen res ratio - w: {0:.0f}%, h: {1:.0f}%".format(img_render_ratio['w'] * 100, img_render_ratio['h'] * 100))
-
-    bpy.ops.sequencer.refresh_all()
-
-    scaled_img_h = scene.render.resolution_y    # 1.0 scale y == 100% render_res.h
-    scaled_img_w = scene.render.resolution_x    # stretched value
-    scaled_img_w_target = img_res['w'] / img_res['h'] * scaled_img_h  # final value we're after
-    img_rescale_y = scaled_img_w_target / scaled_img_w  # what is that as a percentage of stretch?
-
+def fit_scale (img_w, img_h, render_w, render_h, scale=1.0):
+    """Transform strip x and y scale that undo the stretch of an image filling the render frame"""
+    # 1.0 scale y == 100% render height, x stretched to render width
+    scaled_img_w_target = img_w / img_h * render_h  # final value we're after
+    img_rescale_x = scaled_img_w_target / render_w  # what is that as a percentage of stretch?
+    return (img_rescale_x * scale, scale)
+
+def add_pretty_strip (sequences, name, path, size, scale=1.0, channel=1, frame_start=1, length=10, alpha=True, frames=()):
+    """Create an image strip and a transform strip sized to the image's own dimensions
+
+    Paths in frames are added after path as further frames of the image strip.
+    """
+    render = bpy.context.scene.render
+    strip = sequences.new_image(name=name, filepath=path, channel=channel, frame_start=frame_start)
+    for frame_path in frames:
+        strip.elements.append(os.path.basename(frame_path))
+    strip.frame_final_duration = length
+    transform_strip = sequences.new_effect(name="{0}.transform".format(name), type='TRANSFORM', channel=channel + 1, frame_start=frame_start, frame_end=frame_start + length, seq1=strip)
     transform_strip.use_uniform_scale = False
-    transform_strip.scale_start_y = scale                   # w
-    transform_strip.scale_start_x = img_rescale_y * scale   # h
+    transform_strip.scale_start_x, transform_strip.scale_start_y = fit_scale(size['width'], size['height'], render.resolution_x, render.resolution_y, scale=scale)
 
     # set strip opacity
     if alpha:
@@ -102,20 +66,109 @@ def load_scale_img (name, path, scale=1.0, channel=1, length=10, alpha=True):
         strip.blend_type = 'ALPHA_OVER'
         strip.blend_alpha = 0.0
 
-    # set strip length
-    strip.frame_final_duration = length
-
-    scene.frame_current = frame_initial
+    return strip
 
-    deselect_strips()
+def expand_paths (paths, recursive=False, workers=8):
+    """Replace folders in a list of paths with the images the index finds in them, in name order"""
+    expanded = []
+    for path in paths:
+        if os.path.isdir(bpy.path.abspath(path)):
+            expanded += sorted(found for found, stat in get_image_index().scan(path, recursive=recursive, workers=workers))
+        else:
+            expanded.append(path)
+    return expanded
+
+def sequence_frames (path, workers=8):
+    """List the frame files of the numbered image sequence a path belongs to, in frame order"""
+    path = os.path.abspath(bpy.path.abspath(path))
+    index = get_image_index()
+    index.scan(os.path.dirname(path), recursive=False, workers=workers)
+    sequence = index.sequence(path)
+    if sequence is None:
+        return [path]
+    # the index stores frame numbers, so rebuild each frame's name from the sequence pattern
+    directory, pattern = os.path.split(sequence_key(path))
+    digits = pattern.count('#')
+    prefix, suffix = pattern.split('#' * digits)
+    frame_paths = [os.path.join(directory, "{0}{1}{2}".format(prefix, str(number).zfill(digits), suffix)) for number in range(sequence['first'], sequence['last'] + 1)]
+    frame_paths = [frame_path for frame_path in frame_paths if frame_path in index.images]
+    if len(frame_paths) < sequence['last'] - sequence['first'] + 1:
+        print("pretty_img - {0} of frames {1}-{2} found for sequence {3}".format(sequence['frames'], sequence['first'], sequence['last'], pattern))
+    return frame_paths
+
+def load_scale_imgs (paths, scale=1.0, channel=1, length=10, alpha=True, frame_start=None, use_sequences=False, workers=8):
+    """Add many images with fitted transform strips, one after another from frame_start
+
+    Image sizes come from the image index, which reads new file headers on a thread pool
+    instead of rendering each image, so this runs without a GUI (blender -b). Folders load
+    every image in them. With use_sequences each numbered image loads its whole sequence
+    as one strip lasting one frame per image.
+    """
+    scene = bpy.context.scene
+    scene.sequence_editor_create()
+    sequences = scene.sequence_editor.sequences
+    frame = scene.frame_current if frame_start is None else frame_start
+
+    timer = time.time()
+    paths = expand_paths(paths, workers=workers)
+    if use_sequences:
+        # one strip per sequence, led by its first frame
+        groups = {}
+        for path in paths:
+            frame_paths = sequence_frames(path, workers=workers)
+            groups.setdefault(frame_paths[0], frame_paths)
+        groups = list(groups.values())
+    else:
+        groups = [[path] for path in paths]
+    sizes = get_image_index().infos([group[0] for group in groups], workers=workers)
+    read_time = time.time() - timer
+
+    strips = []
+    for group, size in zip(groups, sizes):
+        path = group[0]
+        if not (size and size['width'] and size['height']):
+            print("pretty_img - Failed to read width and height for img: {0}".format(path))
+            continue
+        strip_length = len(group) if len(group) > 1 else length
+        strips.append(add_pretty_strip(sequences, os.path.basename(path), path, size, scale=scale, channel=channel, frame_start=frame, length=strip_length, alpha=alpha, frames=group[1:]))
+        frame += strip_length
+
+    print("pretty_img - looked up {0} image sizes in {1:.4f}s, added {2} strips in {3:.4f}s".format(
+        len(paths), read_time, len(strips), time.time() - timer - read_time
+    ))
+    return strips
 
-    return strip
+def load_scale_img (name, path, scale=1.0, channel=1, length=10, alpha=True):
+    """Add one image at the playhead with a transform strip fitted to its dimensions"""
+    scene = bpy.context.scene
+    scene.sequence_editor_create()
+    size = get_image_index().info(path)
+    if not (size and size['width'] and size['height']):
+        print("pretty_img - Failed to rescale img with width or height of 0: {0}".format(path))
+        return
+    print("%s: %s" % (name, "{0} x {1}".format(size['width'], size['height'])))
+    return add_pretty_strip(scene.sequence_editor.sequences, name, path, size, scale=scale, channel=channel, frame_start=scene.frame_current, length=length, alpha=alpha)
+
+def parse_args (argv=sys.argv):
+    """Read image loading options passed after -- on the Blender command line"""
+    argv = argv[argv.index('--') + 1:] if '--' in argv else []
+    parser = argparse.ArgumentParser(description="Load images with fitted transform strips")
+    parser.add_argument('images', nargs='+', help="image files or folders of images to load")
+    parser.add_argument('--scale', type=float, default=1.0, help="transform scale applied to fitted images")
+    parser.add_argument('--channel', type=int, default=1, help="channel for image strips (transforms go one above)")
+    parser.add_argument('--length', type=int, default=10, help="frame duration of each image")
+    parser.add_argument('--start', type=int, default=None, help="frame to place the first image at")
+    parser.add_argument('--no-alpha', action='store_true', help="skip alpha over blending")
+    parser.add_argument('--sequence', action='store_true', help="load each numbered image's whole sequence as one strip")
+    parser.add_argument('--save', action='store_true', help="save the .blend after loading")
+    return parser.parse_args(argv)
 
 # UI menu properties
 PrettyImageProperties = {
     'alpha': BoolProperty(name="Transparency", description="Use alpha blend on image transform", default=True),
     'scale': FloatProperty(name="Scale", description="Transform scale to apply to fitted image", default=1.0),
-    'length': IntProperty(name="Strip length", description="Frame duration of imported images", default=10)
+    'length': IntProperty(name="Strip length", description="Frame duration of imported images", default=10),
+    'sequence': BoolProperty(name="Image sequences", description="Load each numbered image's whole sequence as one strip", default=False)
 }
 
 class PrettyImagePanel (bpy.types.Panel):
@@ -148,6 +201,7 @@ class PrettyImageOperator (bpy.types.Operator):
     set_alpha = PrettyImageProperties['alpha']
     img_scale = PrettyImageProperties['scale']
     length = PrettyImageProperties['length']
+    use_sequences = PrettyImageProperties['sequence']
 
     def store_files (self, files):
         img_filenames = []
@@ -160,8 +214,7 @@ class PrettyImageOperator (bpy.types.Operator):
         bpy.context.scene.sequence_editor_create()  # verify vse is valid in scene
         img_filenames = self.store_files(self.files)
         img_path = self.directory
-        for filename in img_filenames:
-            load_scale_img(filename, "{0}{1}".format(img_path, filename), scale=self.img_scale, length=self.length, alpha=self.set_alpha)
+        load_scale_imgs(["{0}{1}".format(img_path, filename) for filename in img_filenames], scale=self.img_scale, length=self.length, alpha=self.set_alpha, use_sequences=self.use_sequences)
         return {'FINISHED'}
 
     def invoke (self, context, event):
@@ -178,5 +231,11 @@ def unregister():
     bpy.utils.unregister_class(PrettyImageOperator)
 
 if __name__ == '__main__':
-    register()
+    # load images passed on the command line, otherwise register the UI
+    if '--' in sys.argv:
+        args = parse_args()
+        load_scale_imgs(args.images, scale=args.scale, channel=args.channel, length=args.length, alpha=not args.no_alpha, frame_start=args.start, use_sequences=args.sequence)
+        args.save and bpy.ops.wm.save_mainfile()
+    else:
+        register()
     #unregister()
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import tempfile
+import subprocess
+import bpy
+from bpy.props import *
+
+## Proxy Builder
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Build 25% and 50% JPEG proxies for image sequence strips in parallel and point
+## the strips at them so the sequencer preview stays responsive on 4K frames.
+## Frames are downsampled by image_proxies.py (Pillow) in a process pool run with
+## Blender's bundled Python, and frames whose proxies are newer than the source
+## are skipped. Proxies go where Blender looks for image strip proxies:
+##
+##   <proxy dir>/images/<size>/<filename>_proxy.jpg
+##
+## NOTE set the preview's Proxy Render Size to 25% or 50% to play the proxies
+
+bpy.types.Scene.proxy_builder_quality = IntProperty(
+    name = 'JPEG Quality',
+    default = 90,
+    min = 1,
+    max = 100,
+    description = 'Quality of generated proxy frames'
+    )
+
+# proxy sizes built for every strip
+proxy_sizes = (25, 50)
+
+# worker script run outside Blender's own interpreter
+worker_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_proxies.py")
+
+def strip_proxy_directory(strip):
+    """Custom proxy directory for a strip, defaulting to BL_proxy next to its frames"""
+    if strip.use_proxy and strip.proxy.use_proxy_custom_directory and strip.proxy.directory:
+        return bpy.path.abspath(strip.proxy.directory)
+    return os.path.join(bpy.path.abspath(strip.directory), "BL_proxy")
+
+def strip_proxy_jobs(strip, sizes=proxy_sizes):
+    """List (source, [(percent, target)]) for every frame of an image strip"""
+    directory = bpy.path.abspath(strip.directory)
+    proxy_directory = strip_proxy_directory(strip)
+    return [
+        (os.path.join(directory, element.filename), [
+            (size, os.path.join(proxy_directory, "images", str(size), "{0}_proxy.jpg".format(element.filename)))
+            for size in sizes
+        ])
+        for element in strip.elements
+    ]
+
+def use_strip_proxies(strip, sizes=proxy_sizes):
+    """Point a strip's proxy settings at the built proxies"""
+    proxy_directory = strip_proxy_directory(strip)
+    strip.use_proxy = True
+    strip.proxy.use_proxy_custom_directory = True
+    strip.proxy.directory = proxy_directory
+    for size in (25, 50, 75, 100):
+        setattr(strip.proxy, "build_{0}".format(size), size in sizes)
+    return strip
+
+def run_workers(jobs, quality=90, workers=None):
+    """Run the proxy worker script on a list of jobs, printing progress and throughput"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as jobs_file:
+        json.dump({'jobs': jobs, 'quality': quality, 'workers': workers}, jobs_file)
+    timer = time.time()
+    worker = subprocess.Popen([bpy.app.binary_path_python, worker_path, jobs_file.name], stdout=subprocess.PIPE, universal_newlines=True)
+    finished = 0
+    written = 0
+    reported = 0
+    for line in worker.stdout:
+        if not line.startswith("done"):
+            print(line.rstrip())
+            continue
+        finished += 1
+        written += int(line.split()[1])
+        # report roughly every 5% of frames
+        if finished * 20 // len(jobs) > reported or finished == len(jobs):
+            reported = finished * 20 // len(jobs)
+            elapsed = max(time.time() - timer, 0.001)
+            print("proxy_builder - {0}/{1} frames ({2:.0f}%), {3:.1f} frames/s".format(finished, len(jobs), 100.0 * finished / len(jobs), finished / elapsed))
+    worker.wait()
+    os.remove(jobs_file.name)
+    if worker.returncode:
+        raise Exception("proxy_builder - proxy worker failed with exit code {0}".format(worker.returncode))
+    return {'frames': finished, 'written': written, 'seconds': time.time() - timer}
+
+def build_strip_proxies(strips, sizes=proxy_sizes, quality=90, workers=None):
+    """Build proxies for image strips in parallel and switch the strips over to them"""
+    strips = [strip for strip in strips if strip.type == 'IMAGE']
+    # several strips split from one sequence share frames, so gather each source's
+    # distinct (size, target) proxies across strips and build each of them once
+    targets = {}
+    for strip in strips:
+        for source, source_targets in strip_proxy_jobs(strip, sizes=sizes):
+            for target in source_targets:
+                targets.setdefault(source, {})[target] = True
+    jobs = [(source, list(source_targets)) for source, source_targets in targets.items()]
+    if not jobs:
+        return None
+    report = run_workers(jobs, quality=quality, workers=workers)
+    for strip in strips:
+        use_strip_proxies(strip, sizes=sizes)
+    print("proxy_builder - {0} strips, {1} frames, {2} proxies written in {3:.2f}s ({4:.1f} frames/s)".format(
+        len(strips), report['frames'], report['written'], report['seconds'], report['frames'] / max(report['seconds'], 0.001)
+    ))
+    return report
+
+class ProxyBuilderPanel (bpy.types.Panel):
+    bl_label = 'Image Proxies'
+    bl_idname = 'strip.proxy_builder_panel'
+    bl_space_type = 'SEQUENCE_EDITOR'
+    bl_region_type = 'UI'
+    def draw (self, context):
+        self.layout.prop(context.scene, 'proxy_builder_quality')
+        self.layout.operator('strip.build_image_proxies', text="Build Proxies")
+
+class BuildImageProxiesOperator (bpy.types.Operator):
+    bl_label = 'Build Image Proxies'
+    bl_idname = 'strip.build_image_proxies'
+    bl_description = 'Build 25% and 50% proxies for the selected image strips in parallel'
+    def execute (self, context):
+        strips = [strip for strip in context.scene.sequence_editor.sequences if strip.select]
+        report = build_strip_proxies(strips, quality=context.scene.proxy_builder_quality)
+        if report is None:
+            self.report({'WARNING'}, "No image strips selected")
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Built {0} proxies for {1} frames in {2:.1f}s".format(report['written'], report['frames'], report['seconds']))
+        return {'FINISHED'}
+
+def register():
+    bpy.utils.register_class(ProxyBuilderPanel)
+    bpy.utils.register_class(BuildImageProxiesOperator)
+
+def unregister():
+    bpy.utils.unregister_class(ProxyBuilderPanel)
+    bpy.utils.unregister_class(BuildImageProxiesOperator)
+
+if __name__ == '__main__':
+    register()
@@ -1,5 +1,6 @@
 import bpy
 from random import shuffle
+from strip_index import get_strip_index
 
 ## Shuffle Selected Strips
 ##
@@ -15,9 +16,12 @@ from random import shuffle
 
 def move_strips_away(strips):
     """Move sequences out of the way to make space for easy reordering"""
-    # /!\ break risk: very long strips or many h of strips
-    for s in strips:
-        s.frame_start += 999999
+    # park strips just past the latest strip end in any channel
+    index = get_strip_index(rebuild=True)
+    offset = index.last_end() - min(s.frame_final_start for s in strips) + 1
+    for s in sorted(strips, key=lambda x: x.frame_final_start, reverse=True):
+        s.frame_start += offset
+        index.update(s)
     return strips
 
 def swap_two_strips(strip_1, strip_2):
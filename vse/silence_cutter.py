@@ -0,0 +1,146 @@
+import time
+import numpy as np
+import bpy
+from bpy.props import *
+from audio_features import get_feature_store
+from cut_smash import merge_ranges, subtract_ranges, plan_range_removals, apply_range_removals
+
+## Silence Cutter
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Find dead air in selected sound strips and cut it out of the timeline.
+## Per-frame loudness comes from the memory-mapped audio feature store, which
+## streams each WAV from disk once, so an hour of audio never sits in memory.
+## Runs quieter than a dB threshold for at least a minimum number of frames are
+## soft cut and closed in one batch. Only the sound strips and the strips stacked
+## with them (overlapping them in other channels) are cut, and every later strip
+## moves back by the frames removed before it.
+##
+## NOTE a frame only counts as silent when every selected sound strip under it
+## is silent there, so one quiet track does not cut another track's audio
+
+bpy.types.Scene.silence_threshold = FloatProperty(
+    name = 'Threshold (dB)',
+    default = -40.0,
+    max = 0.0,
+    description = 'Frames quieter than this RMS level count as silent'
+    )
+
+bpy.types.Scene.silence_min_frames = IntProperty(
+    name = 'Minimum (frames)',
+    default = 12,
+    min = 1,
+    description = 'Shortest silent run to cut out'
+    )
+
+bpy.types.Scene.silence_padding = IntProperty(
+    name = 'Padding (frames)',
+    default = 2,
+    min = 0,
+    description = 'Silent frames to keep on each side of a cut'
+    )
+
+def silent_runs(levels, threshold_db=-40.0, min_frames=12, padding=0):
+    """List (start, end) indexes of runs below threshold_db at least min_frames long
+
+    Arguments:
+    levels -- per-frame RMS amplitudes (a memory-mapped view is fine)
+    padding -- frames of silence left on each side of every run
+    """
+    threshold = 10 ** (threshold_db / 20.0)
+    quiet = np.concatenate(([False], np.asarray(levels) < threshold, [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    long_enough = ends - starts >= min_frames
+    starts, ends = starts[long_enough] + padding, ends[long_enough] - padding
+    keep = ends > starts
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+def strip_silences(strip, threshold_db=-40.0, min_frames=12, padding=0, store=None):
+    """List silent (start, end) timeline frame ranges in the visible part of a sound strip"""
+    store = get_feature_store() if store is None else store
+    features = store.strip_features(strip)
+    first = strip.animation_offset_start + strip.frame_offset_start
+    levels = features.column('rms')[first:first + strip.frame_final_duration]
+    start = strip.frame_final_start
+    return [
+        (start + a, start + b)
+        for a, b in silent_runs(levels, threshold_db=threshold_db, min_frames=min_frames, padding=padding)
+    ]
+
+def silence_ranges(strips, threshold_db=-40.0, min_frames=12, padding=0):
+    """Timeline ranges silent in every one of the sound strips that play there"""
+    store = get_feature_store()
+    silent = []
+    audible = []
+    for strip in strips:
+        ranges = strip_silences(strip, threshold_db=threshold_db, min_frames=min_frames, padding=padding, store=store)
+        silent += ranges
+        audible += subtract_ranges([(strip.frame_final_start, strip.frame_final_end)], merge_ranges(ranges))
+    return subtract_ranges(merge_ranges(silent), merge_ranges(audible))
+
+def stacked_strips(strips, sequences):
+    """Top-level strips overlapping any of the given strips in time, in any channel"""
+    spans = merge_ranges([(strip.frame_final_start, strip.frame_final_end) for strip in strips])
+    return [
+        strip for strip in sequences
+        if any(strip.frame_final_start < end and start < strip.frame_final_end for start, end in spans)
+    ]
+
+def cut_silences(strips=None, threshold_db=-40.0, min_frames=12, padding=0):
+    """Soft cut silent runs out of sound strips and linked strips and close the gaps in one edit"""
+    scene = bpy.context.scene
+    sequences = scene.sequence_editor.sequences
+    if strips is None:
+        strips = [strip for strip in sequences if strip.select]
+    strips = [strip for strip in strips if strip.type == 'SOUND']
+    timer = time.time()
+    ranges = silence_ranges(strips, threshold_db=threshold_db, min_frames=min_frames, padding=padding)
+    analysed = time.time()
+    cut_names = set(strip.name for strip in stacked_strips(strips, sequences))
+    plan = plan_range_removals(list(sequences), ranges, cut_names=cut_names)
+    apply_range_removals(plan, sequences)
+    print("silence_cutter - analysed {0} sound strips in {1:.4f}s, removed {2} silences ({3} frames) with {4} new substrips in {5:.4f}s".format(
+        len(strips), analysed - timer, len(plan['ranges']), plan['delta'], len(plan['created']), time.time() - analysed
+    ))
+    for strip in plan['skipped']:
+        print("silence_cutter - left {0} strip {1} uncut".format(strip.type, strip.name))
+    return plan
+
+class SilenceCutterPanel (bpy.types.Panel):
+    bl_label = 'Silence Cutter'
+    bl_idname = 'strip.silence_cutter_panel'
+    bl_space_type = 'SEQUENCE_EDITOR'
+    bl_region_type = 'UI'
+    def draw (self, context):
+        self.layout.prop(context.scene, 'silence_threshold')
+        self.layout.prop(context.scene, 'silence_min_frames')
+        self.layout.prop(context.scene, 'silence_padding')
+        self.layout.operator('strip.silence_cut', text="Cut Silences")
+
+class SilenceCutOperator (bpy.types.Operator):
+    bl_label = 'Cut Silences'
+    bl_idname = 'strip.silence_cut'
+    bl_description = 'Cut silent stretches of the selected sound strips out of the timeline and close the gaps'
+    bl_options = {'REGISTER', 'UNDO'}
+    def execute (self, context):
+        scene = context.scene
+        plan = cut_silences(
+            threshold_db=scene.silence_threshold,
+            min_frames=scene.silence_min_frames,
+            padding=scene.silence_padding
+        )
+        self.report({'INFO'}, "Removed {0} silences ({1} frames), left {2} strips uncut".format(len(plan['ranges']), plan['delta'], len(plan['skipped'])))
+        return {'FINISHED'}
+
+def register():
+    bpy.utils.register_class(SilenceCutterPanel)
+    bpy.utils.register_class(SilenceCutOperator)
+
+def unregister():
+    bpy.utils.unregister_class(SilenceCutterPanel)
+    bpy.utils.unregister_class(SilenceCutOperator)
+
+if __name__ == '__main__':
+    register()
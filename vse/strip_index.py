@@ -0,0 +1,216 @@
+#!/usr/bin/python
+import bisect
+import bpy
+
+## Strip Index
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Per-channel index of strip frames for neighbour, overlap and gap lookups.
+## Build it once, update strips as they move, then query in log time instead of
+## scanning sequences_all or leaning on gap_remove/gap_insert. A strip moved without
+## passing a neighbour is updated in place in log time. Adding, removing or
+## reordering strips shifts the channel's sorted lists (linear time) and rebuilds
+## the gap tree on the next gap query.
+##
+## NOTE strips in one channel are expected not to overlap (the sequencer shuffles
+## overlapping strips into free channels), so ends stay sorted alongside starts.
+
+class ChannelIntervals:
+	def __init__(self):
+		self.starts = []
+		self.ends = []
+		self.names = []
+		# lazily built max tree over the gaps between neighbouring strips
+		self._gap_tree = None
+
+	def __len__(self):
+		return len(self.names)
+
+	def insert(self, name, start, end):
+		"""Add a strip span keeping strips sorted by start frame"""
+		i = bisect.bisect_right(self.starts, start)
+		self.starts.insert(i, start)
+		self.ends.insert(i, end)
+		self.names.insert(i, name)
+		self._gap_tree = None
+		return i
+
+	def _position(self, name, start):
+		"""List position of a strip given its name and the start it was indexed at"""
+		i = bisect.bisect_left(self.starts, start)
+		while i < len(self.names) and self.names[i] != name:
+			i += 1
+		return i if i < len(self.names) else self.names.index(name)
+
+	def remove(self, name, start):
+		"""Drop a strip span given its name and the start it was indexed at"""
+		i = self._position(name, start)
+		del self.starts[i]
+		del self.ends[i]
+		del self.names[i]
+		self._gap_tree = None
+		return name
+
+	def move(self, name, old_start, start, end):
+		"""Move a strip span in place if it stays between its neighbours, returning False if not"""
+		i = self._position(name, old_start)
+		if (i > 0 and self.starts[i - 1] > start) or (i + 1 < len(self.names) and self.starts[i + 1] < start):
+			return False
+		self.starts[i] = start
+		self.ends[i] = end
+		# only the gaps either side of the strip changed
+		if self._gap_tree is not None:
+			for gap_index in (i - 1, i):
+				0 <= gap_index < len(self.names) - 1 and self._set_gap(gap_index)
+		return True
+
+	def _set_gap(self, gap_index):
+		"""Refresh one neighbour gap and the widest gaps above it in the gap tree"""
+		size, tree = self._gap_tree
+		node = size + gap_index
+		tree[node] = self.starts[gap_index + 1] - self.ends[gap_index]
+		node //= 2
+		while node:
+			tree[node] = max(tree[2 * node], tree[2 * node + 1])
+			node //= 2
+
+	def next_right(self, frame):
+		"""Name of the first strip starting at or after frame"""
+		i = bisect.bisect_left(self.starts, frame)
+		return self.names[i] if i < len(self.names) else None
+
+	def right_of(self, frame):
+		"""Names of all strips starting at or after frame, earliest first"""
+		return self.names[bisect.bisect_left(self.starts, frame):]
+
+	def overlapping(self, frame_a, frame_b):
+		"""Names of strips overlapping the frame range [frame_a, frame_b)"""
+		i = bisect.bisect_right(self.ends, frame_a)
+		names = []
+		while i < len(self.names) and self.starts[i] < frame_b:
+			names.append(self.names[i])
+			i += 1
+		return names
+
+	def _build_gap_tree(self):
+		"""Store the widest gap under each node of a binary tree over neighbour gaps"""
+		gaps = [self.starts[i + 1] - self.ends[i] for i in range(len(self.names) - 1)]
+		size = 1
+		while size < len(gaps):
+			size *= 2
+		tree = [float('-inf')] * (2 * size)
+		tree[size:size + len(gaps)] = gaps
+		for node in range(size - 1, 0, -1):
+			tree[node] = max(tree[2 * node], tree[2 * node + 1])
+		self._gap_tree = (size, tree)
+		return self._gap_tree
+
+	def _first_gap_index(self, lowest, length):
+		"""Find the leftmost neighbour gap at or after index lowest that is length frames wide"""
+		size, tree = self._gap_tree or self._build_gap_tree()
+		def descend(node, node_low, node_high):
+			if node_high <= lowest or tree[node] < length:
+				return None
+			if node >= size:
+				return node - size
+			middle = (node_low + node_high) // 2
+			found = descend(2 * node, node_low, middle)
+			return found if found is not None else descend(2 * node + 1, middle, node_high)
+		return descend(1, 0, size)
+
+	def first_gap(self, length, after=0):
+		"""Return the first frame at or after `after` that starts an empty run of length frames"""
+		if not self.names:
+			return after
+		i = bisect.bisect_right(self.starts, after)
+		# check the free run holding `after` before searching the gaps beyond it
+		free_from = after if i == 0 else max(after, self.ends[i - 1])
+		if i == len(self.names) or self.starts[i] - free_from >= length:
+			return free_from
+		gap_index = self._first_gap_index(i, length)
+		return self.ends[gap_index] if gap_index is not None else self.ends[-1]
+
+class StripIndex:
+	def __init__(self, sequences=None):
+		# channel number -> ChannelIntervals
+		self.channels = {}
+		# strip name -> (channel, start, end) as currently indexed
+		self.spans = {}
+		sequences is not None and self.build(sequences)
+
+	def build(self, sequences):
+		"""Index every strip in a collection of sequences from scratch"""
+		self.channels = {}
+		self.spans = {}
+		for strip in sequences:
+			self.add(strip)
+		return self
+
+	def channel(self, channel):
+		"""Get the intervals stored for one channel"""
+		if channel not in self.channels:
+			self.channels[channel] = ChannelIntervals()
+		return self.channels[channel]
+
+	def add(self, strip):
+		"""Index a strip at its current channel and frames"""
+		span = (strip.channel, strip.frame_final_start, strip.frame_final_end)
+		self.spans[strip.name] = span
+		self.channel(span[0]).insert(strip.name, span[1], span[2])
+		return span
+
+	def remove(self, strip):
+		"""Remove a strip (or strip name) from the index"""
+		name = strip if isinstance(strip, str) else strip.name
+		if name not in self.spans:
+			return None
+		channel, start, end = self.spans.pop(name)
+		self.channels[channel].remove(name, start)
+		return name
+
+	def update(self, strip):
+		"""Reindex a strip after it moved, resized or changed channel"""
+		span = (strip.channel, strip.frame_final_start, strip.frame_final_end)
+		indexed = self.spans.get(strip.name)
+		if indexed == span:
+			return span
+		# same channel and same neighbours only needs the span rewritten
+		if indexed is not None and indexed[0] == span[0] and self.channels[span[0]].move(strip.name, indexed[1], span[1], span[2]):
+			self.spans[strip.name] = span
+			return span
+		self.remove(strip)
+		return self.add(strip)
+
+	def next_right(self, channel, frame):
+		"""Name of the next strip right of frame in a channel"""
+		return self.channel(channel).next_right(frame)
+
+	def right_of(self, channel, frame):
+		"""Names of strips starting at or after frame in a channel"""
+		return self.channel(channel).right_of(frame)
+
+	def overlapping(self, channel, frame_a, frame_b):
+		"""Names of strips in a channel overlapping [frame_a, frame_b)"""
+		return self.channel(channel).overlapping(frame_a, frame_b)
+
+	def first_gap(self, channel, length, after=0):
+		"""First frame at or after `after` in a channel with length empty frames"""
+		return self.channel(channel).first_gap(length, after=after)
+
+	def last_end(self, channel=None):
+		"""Latest end frame in one channel or across all channels"""
+		channels = [self.channel(channel)] if channel is not None else self.channels.values()
+		ends = [intervals.ends[-1] for intervals in channels if len(intervals)]
+		return max(ends) if ends else None
+
+# one shared index per scene so VSE tools can build once and update as they edit
+strip_indexes = {}
+
+def get_strip_index(scene=None, rebuild=False):
+	"""Return the shared strip index for a scene's top-level sequences"""
+	scene = bpy.context.scene if scene is None else scene
+	scene.sequence_editor_create()
+	if rebuild or scene.name not in strip_indexes:
+		strip_indexes[scene.name] = StripIndex(scene.sequence_editor.sequences)
+	return strip_indexes[scene.name]
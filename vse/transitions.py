@@ -1,44 +1,48 @@
 import math
+import bisect
 import bpy
 from bpy.props import *
 
 class Transition (object):
-    def handler ():
-        # all transitions to call mapped to transition_type string
-        effect = {'left':Transition.left, 'right':Transition.right,
+    # collects (strip, property_name, end_value, starting_frame, duration) while batching
+    batch = None
+
+    def effects ():
+        """Map each transition_type string to the transition to call"""
+        return {'left':Transition.left, 'right':Transition.right,
                 'top':Transition.top, 'bottom':Transition.bottom,
                 'fade':Transition.opacity_down, 'unfade':Transition.opacity_up, 
                 'scale':Transition.scale, 'scale_down':Transition.scale_down, 
                 'clockwise':Transition.rotate_clock,'counterclock':Transition.rotate_counterclock}
+
+    def placement (strip):
+        """Find the starting frame and duration (negative for "in") of a strip's transition"""
+        # length of the transition (distance between keyframes)
+        duration = strip.transition_frames
+        if strip.transition_placement == 'in':
+            # count frames from left edge of the strip, reversing duration for transition "in" effect
+            return (strip.frame_start + duration, -duration)
+        elif strip.transition_placement == 'out':
+            # count frames from right edge of the strip
+            return (strip.frame_start + strip.frame_final_duration - duration, duration)
+        # current frame
+        return (bpy.context.scene.frame_current, duration)
+
+    def handler ():
+        # all transitions to call mapped to transition_type string
+        effect = Transition.effects()
         # references to active transform strip
         strip = bpy.context.scene.sequence_editor.active_strip
         #parent = strip.input_1     # parent of active transform strip
-        # length of the transition (distance between keyframes)
-        duration = strip.transition_frames
-        
-        if strip.transition_placement == 'mid':
-            # current frame
-            start_frame = bpy.context.scene.frame_current
-            # call the effect function
-            effect[strip.transition_type] (strip, start_frame, duration)
-       
-        elif strip.transition_placement == 'in':
-            # count frames from left edge of the strip
-            start_frame = strip.frame_start + duration
-            # call the effect function, reversing duration for transition "in" effect
-            effect[strip.transition_type] (strip, start_frame, -duration)
-            
+        start_frame, duration = Transition.placement(strip)
+        # call the effect function
+        effect[strip.transition_type] (strip, start_frame, duration)
+
+        if strip.transition_placement == 'in':
             # move playhead to avoid keyframing wrong values back-to-back
             bpy.context.scene.frame_current = start_frame + 1
         
         elif strip.transition_placement == 'out':
-            # count frames from right edge of the strip
-            start_frame = strip.frame_start + strip.frame_final_duration - duration
-            # move playhead to last frame to avoid keyframing to wrong values
-            #bpy.context.scene.frame_current = strip.frame_start + strip.frame_final_duration
-            # call the effect function
-            effect[strip.transition_type] (strip, start_frame, duration)
-            
             # move playhead to avoid keyframing wrong values back-to-back 
             bpy.context.scene.frame_current = start_frame - 1        
             
@@ -50,6 +54,76 @@ class Transition (object):
             ##        have two edge values (offscreen, transparent, rotated, etc.)
         return None
 
+    def handler_batch (strips):
+        """Add each strip's transition by writing keyframe points straight into fcurves
+
+        Skips frame_set and keyframe_insert and refreshes the sequencer once at the end.
+        """
+        effect = Transition.effects()
+        Transition.batch = []
+        try:
+            for strip in strips:
+                start_frame, duration = Transition.placement(strip)
+                effect[strip.transition_type] (strip, start_frame, duration)
+            keyframes = Transition.batch
+        finally:
+            Transition.batch = None
+
+        scene = bpy.context.scene
+        fcurves = Transition.get_fcurves(scene)
+
+        # gather frame:value pairs for each animated property path
+        points = {}
+        end_values = []
+        for strip, property_name, end_value, starting_frame, duration in keyframes:
+            data_path = strip.path_from_id(property_name)
+            fcurve = fcurves.find(data_path)
+            # start from the animated value where one exists, otherwise the current value
+            start_value = fcurve.evaluate(starting_frame) if fcurve else getattr(strip, property_name)
+            points.setdefault(data_path, {})
+            points[data_path][float(starting_frame)] = start_value
+            points[data_path][float(starting_frame + duration)] = end_value
+            end_values.append((strip, property_name, end_value))
+            # set transparency type to stack with other images/movies
+            strip.blend_type = 'ALPHA_OVER'
+
+        for data_path in points:
+            fcurve = fcurves.find(data_path) or fcurves.new(data_path)
+            Transition.write_keyframes(fcurve, points[data_path])
+
+        # give each property its final value as set does
+        for strip, property_name, end_value in end_values:
+            setattr(strip, property_name, end_value)
+
+        # refresh the sequence editor window once for every strip
+        bpy.ops.sequencer.refresh_all()
+        return points
+
+    def get_fcurves (scene):
+        """Return the scene action fcurves that hold strip keyframes, creating the action if needed"""
+        scene.animation_data_create()
+        if scene.animation_data.action is None:
+            scene.animation_data.action = bpy.data.actions.new(scene.name + "Action")
+        return scene.animation_data.action.fcurves
+
+    def write_keyframes (fcurve, frame_values):
+        """Merge frame:value pairs into an fcurve, replacing points already on those frames"""
+        keyframe_points = fcurve.keyframe_points
+        co = [0.0] * (len(keyframe_points) * 2)
+        keyframe_points.foreach_get('co', co)
+        existing = {co[i]: i for i in range(0, len(co), 2)}
+        added = []
+        for frame, value in frame_values.items():
+            if frame in existing:
+                co[existing[frame] + 1] = value
+            else:
+                added += [frame, value]
+        keyframe_points.add(len(added) // 2)
+        keyframe_points.foreach_set('co', co + added)
+        # sort points and recalculate handles
+        fcurve.update()
+        return fcurve
+
     def get_screen_dimensions (strip):
         # edges of screen (as percentage) accounting for image scale and uniform scale toggled
         width = 50 + strip.scale_start_x * 50
@@ -61,6 +135,11 @@ class Transition (object):
 
     def set (strip, property_name, end_value, starting_frame, duration):
         """Move to starting frame, set a keyframe for a property, move to final frame (starting frame plus duration), change property value, set keyframe for the property."""
+        # store keyframes for handler_batch to write instead of inserting them here
+        if Transition.batch is not None:
+            Transition.batch.append((strip, property_name, end_value, starting_frame, duration))
+            return None
+
         # move to and keyframe the starting frame (just leaving its current value)
         bpy.context.scene.frame_set(starting_frame)
         strip.keyframe_insert (property_name, -1, starting_frame)
@@ -98,46 +177,54 @@ class Transition (object):
 
     def clear (strip):
         """Remove all keyframes from the transition properties fields and reset their values"""
-        # select frame in the center of the strip and remember values
-        bpy.context.scene.frame_current = ((strip.frame_start+strip.frame_final_duration) - strip.frame_start) * 0.5
-        remember_values =               \
-            [ strip.blend_alpha,        \
-            strip.translate_start_x,    \
-            strip.translate_start_y,    \
-            strip.use_uniform_scale,    \
-            strip.scale_start_x,        \
-            strip.scale_start_y,        \
-            strip.rotation_start ]
-        # move to the first frame in this strip
-        bpy.context.scene.frame_current = strip.frame_start
-        # get list of all properties that Transition messes with
-        properties = Transition.strip_properties(strip)
-        # count through every frame looking for keyframes
-        for frame in range (strip.frame_start-1, strip.frame_start+strip.frame_final_duration+1):
-            # attempt to remove keyframes on all transition properties this frame
-            for prop in properties:
-                try:
-                    strip.keyframe_delete(prop, -1, frame)
-                except:
-                    pass
-            # try to skip ahead to the next keyframe
-            try:
-                bpy.ops.screen.keyframe_jump()
-            except:
-                pass
-            # set the frame variable to match skip ahead
-            frame = bpy.context.scene.frame_current
-        # reset transform properties to default values
-        strip.translate_start_x = remember_values[1]
-        strip.translate_start_y = remember_values[2]
-        strip.blend_alpha = remember_values[0]
-        strip.use_uniform_scale = remember_values[3]
-        strip.scale_start_x = remember_values[4]
-        strip.scale_start_y = remember_values[5]
-        strip.rotation_start = remember_values[6]
+        return Transition.clear_strips([strip])
+
+    def clear_strips (strips):
+        """Remove transition keyframes within each strip's frames and keep the strips' current values"""
+        scene = bpy.context.scene
+        if scene.animation_data is None or scene.animation_data.action is None:
+            return []
+        fcurves = scene.animation_data.action.fcurves
+        # look up every fcurve by its data path once for all strips
+        fcurves_by_path = {fcurve.data_path: fcurve for fcurve in fcurves}
+        cleared = []
+        for strip in strips:
+            # remember values to reset transform properties after removing their keyframes
+            remember_values = Transition.strip_properties(strip)
+            remember_values['use_uniform_scale'] = strip.use_uniform_scale
+            # window of frames holding this strip's transition keyframes
+            first_frame = strip.frame_start - 1
+            last_frame = strip.frame_start + strip.frame_final_duration + 1
+            for prop in Transition.strip_properties(strip):
+                fcurve = fcurves_by_path.get(strip.path_from_id(prop))
+                if fcurve is None:
+                    continue
+                Transition.remove_keyframes(fcurve, first_frame, last_frame)
+                # drop fcurves left without any keyframes
+                if len(fcurve.keyframe_points) == 0:
+                    fcurves.remove(fcurve)
+            for prop in remember_values:
+                setattr(strip, prop, remember_values[prop])
+            cleared.append(strip)
         # refresh the sequence editor
         bpy.ops.sequencer.refresh_all()
-        return None
+        return cleared
+
+    def remove_keyframes (fcurve, first_frame, last_frame):
+        """Delete the fcurve keyframe points from first_frame up to (not including) last_frame"""
+        # sort points so the frame window is one contiguous run
+        fcurve.update()
+        keyframe_points = fcurve.keyframe_points
+        co = [0.0] * (len(keyframe_points) * 2)
+        keyframe_points.foreach_get('co', co)
+        frames = co[0::2]
+        low = bisect.bisect_left(frames, first_frame)
+        high = bisect.bisect_left(frames, last_frame)
+        # remove from the end of the run so remaining indexes stay valid
+        for i in range(high - 1, low - 1, -1):
+            keyframe_points.remove(keyframe_points[i], fast=True)
+        fcurve.update()
+        return high - low
 
     def strip_properties (strip):
         """Strip property values to transition when given a property name string as key"""
@@ -310,6 +397,9 @@ class CustomTransitionsPanel (bpy.types.Panel):
         # display transition add button
         self.layout.operator('strip.transition_add', text=button_text)
 
+        # display batch transition button for every selected transform strip
+        self.layout.operator('strip.transition_add_selected', text="Transition Selected Strips")
+
         # display keyframe removal button
         self.layout.operator('strip.transition_delete', text="/!\\ Clear Keyframe Fields /!\\")
 
@@ -329,17 +419,29 @@ class AddTransition (bpy.types.Operator):
             add_transform_strip(context.scene.sequence_editor.active_strip)
         return{'FINISHED'}
 
+class AddSelectedTransitions (bpy.types.Operator):
+    bl_label = 'Add Selected Transitions'
+    bl_idname = 'strip.transition_add_selected'
+    bl_description = 'Use each selected transform strip\'s transition settings to write its keyframes in one pass'
+    def execute (self, context):
+        strips = [s for s in context.scene.sequence_editor.sequences_all if s.select and s.type == 'TRANSFORM']
+        strips and Transition.handler_batch(strips)
+        return{'FINISHED'}
+
 class DeleteTransition (bpy.types.Operator):
     bl_label = 'Delete Transitions'
     bl_idname = 'strip.transition_delete'
-    bl_description = 'Delete ALL visible keyframes from strip transition fields (opacity, position, scale, rotation)'
+    bl_description = 'Delete ALL keyframes from selected strips\' transition fields (opacity, position, scale, rotation)'
     def execute (self, context):
-        # delete all keyframes if this is a transform strip
+        # delete all keyframes on the selected transform strips if this is a transform strip
         if context.scene.sequence_editor.active_strip.type == 'TRANSFORM':
+            strips = [s for s in context.scene.sequence_editor.sequences_all if s.select and s.type == 'TRANSFORM']
+            active_strip = context.scene.sequence_editor.active_strip
+            active_strip not in strips and strips.append(active_strip)
             try:
-                Transition.clear(context.scene.sequence_editor.active_strip)
+                Transition.clear_strips(strips)
             except:
-                raise NotImplementedError('Method Transition.clear(strip) not implemented in Transition object')
+                raise NotImplementedError('Method Transition.clear_strips(strips) not implemented in Transition object')
         # otherwise add a transform strip
         else:
             add_transform_strip(context.scene.sequence_editor.active_strip)
@@ -367,11 +469,13 @@ def add_transform_strip (base_strip):
 def register():
     bpy.utils.register_class(CustomTransitionsPanel)
     bpy.utils.register_class(AddTransition)
+    bpy.utils.register_class(AddSelectedTransitions)
     bpy.utils.register_class(DeleteTransition)
 
 def unregister():
     bpy.utils.unregister_class(CustomTransitionsPanel)
     bpy.utils.unregister_class(AddTransition)
+    bpy.utils.unregister_class(AddSelectedTransitions)
     bpy.utils.unregister_class(DeleteTransition)
 
 if __name__ == '__main__':
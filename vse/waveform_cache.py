@@ -0,0 +1,226 @@
+import os
+import numpy as np
+import bpy
+from bpy.props import *
+from audio_levels import read_wav_blocks, sound_path, amplitude_to_db
+from audio_features import get_feature_store
+
+## Waveform Cache
+##
+## Blender Python VSE module by Joshua R (GitHub user Botmasher)
+##
+## Min/max waveform pyramid for each sound strip's audio. Level 0 holds the lowest
+## and highest sample under every frame, and each level above halves the one below
+## it. Levels are stored as int16 arrays in an .npz in the shared audio feature store
+## (audio_features.py) under the audio's content hash. The build operator loads or
+## analyses them into memory by audio path and fps, and the panel only looks them up
+## there, so drawing never hashes or stats files. The peak around the playhead is read
+## from at most two buckets whatever the length of the clip - no scrubbing or redrawing
+## waveforms.
+##
+## NOTE a range is summarised by the aligned buckets covering it, so the result can
+## take in up to twice as many frames as asked for
+
+bpy.types.Scene.waveform_radius = IntProperty(
+    name = 'Radius (frames)',
+    default = 12,
+    min = 0,
+    description = 'Frames either side of the playhead summarised in the waveform panel'
+    )
+
+# loaded pyramids by (audio path, fps) for this session
+pyramids = {}
+
+def frame_min_max(path, fps):
+    """Stream a WAV file and return the lowest and highest sample under each frame at fps"""
+    lows = []
+    highs = []
+    carry = np.zeros(0, dtype=np.float32)
+    # absolute sample index of carry[0] and the next frame to measure
+    base = 0
+    frame = 0
+    for sample_rate, block in read_wav_blocks(path):
+        hop = sample_rate / float(fps)
+        samples = np.concatenate((carry, block))
+        available = base + len(samples)
+        ends = np.round(np.arange(frame + 1, int(available / hop) + 2) * hop).astype(np.int64)
+        ends = ends[ends <= available]
+        if len(ends):
+            starts = np.concatenate(([base], ends[:-1])) - base
+            measured = samples[:ends[-1] - base]
+            lows.append(np.minimum.reduceat(measured, starts))
+            highs.append(np.maximum.reduceat(measured, starts))
+            frame += len(ends)
+            carry = samples[ends[-1] - base:]
+            base = int(ends[-1])
+        else:
+            carry = samples
+    # the last frame only partly covered by audio
+    if len(carry):
+        lows.append(carry.min(keepdims=True))
+        highs.append(carry.max(keepdims=True))
+    if not lows:
+        return (np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32))
+    return (np.concatenate(lows), np.concatenate(highs))
+
+def build_levels(lows, highs):
+    """Halve min/max arrays level by level until a single bucket covers everything"""
+    levels = [(lows, highs)]
+    while len(lows) > 1:
+        if len(lows) % 2:
+            lows = np.append(lows, lows[-1])
+            highs = np.append(highs, highs[-1])
+        lows = np.minimum(lows[0::2], lows[1::2])
+        highs = np.maximum(highs[0::2], highs[1::2])
+        levels.append((lows, highs))
+    return levels
+
+def sidecar_path(path, fps):
+    """Name the .npz waveform pyramid kept in the feature store for an audio file"""
+    return get_feature_store().cache_path(path, fps, suffix="_waveform.npz")
+
+class WaveformPyramid:
+    def __init__(self, levels, fps):
+        # [(lows, highs)] with 2 ** level frames per bucket, as int16 full scale
+        self.levels = levels
+        self.fps = fps
+
+    def __len__(self):
+        return len(self.levels[0][0]) if self.levels else 0
+
+    @classmethod
+    def build(cls, path, fps):
+        """Analyse a WAV file into a pyramid of int16 min/max levels"""
+        lows, highs = frame_min_max(path, fps)
+        levels = [
+            (np.round(low * 32767).astype(np.int16), np.round(high * 32767).astype(np.int16))
+            for low, high in build_levels(lows, highs)
+        ]
+        return cls(levels, fps)
+
+    @classmethod
+    def load(cls, sidecar, fps):
+        """Read a pyramid saved with save"""
+        with np.load(sidecar) as arrays:
+            count = len(arrays.files) // 2
+            levels = [(arrays['min_{0}'.format(i)], arrays['max_{0}'.format(i)]) for i in range(count)]
+        return cls(levels, fps)
+
+    def save(self, sidecar):
+        """Write every level to one compressed .npz"""
+        arrays = {}
+        for i, (lows, highs) in enumerate(self.levels):
+            arrays['min_{0}'.format(i)] = lows
+            arrays['max_{0}'.format(i)] = highs
+        # np.savez appends .npz to names without it, so write through an open file
+        with open(sidecar, 'wb') as sidecar_file:
+            np.savez_compressed(sidecar_file, **arrays)
+        return sidecar
+
+    def range_min_max(self, first, last):
+        """Lowest and highest sample (-1.0 to 1.0) over source frames first to last inclusive
+
+        Reads the smallest level whose buckets are as wide as the range, where the
+        range spans at most two neighbouring buckets.
+        """
+        first = max(first, 0)
+        last = min(last, len(self) - 1)
+        if last < first:
+            return (0.0, 0.0)
+        level = min(int(last - first).bit_length(), len(self.levels) - 1)
+        lows, highs = self.levels[level]
+        a = first >> level
+        b = last >> level
+        return (
+            min(int(lows[a]), int(lows[b])) / 32767.0,
+            max(int(highs[a]), int(highs[b])) / 32767.0
+        )
+
+    def peak(self, first, last):
+        """Highest absolute sample over source frames first to last inclusive"""
+        low, high = self.range_min_max(first, last)
+        return max(-low, high)
+
+def load_pyramid(path, fps):
+    """Read an audio file's waveform pyramid from its sidecar or a fresh analysis and keep it in memory"""
+    # the content hash in the name changes whenever the audio does
+    sidecar = sidecar_path(path, fps)
+    if os.path.isfile(sidecar):
+        pyramid = WaveformPyramid.load(sidecar, fps)
+    else:
+        pyramid = WaveformPyramid.build(path, fps)
+        pyramid.save(sidecar)
+    pyramids[(path, fps)] = pyramid
+    return pyramid
+
+def get_pyramid(path, fps, build=True):
+    """Return the waveform pyramid for an audio file from memory, loading or building it unless build is False"""
+    pyramid = pyramids.get((path, fps))
+    if pyramid is None and build:
+        pyramid = load_pyramid(path, fps)
+    return pyramid
+
+def scene_fps(scene):
+    return scene.render.fps / scene.render.fps_base
+
+def strip_pyramid(strip, build=True):
+    """Waveform pyramid for the audio behind a sound strip at the scene fps"""
+    return get_pyramid(sound_path(strip), scene_fps(bpy.context.scene), build=build)
+
+def strip_summary(strip, frame, radius, build=True):
+    """Summarise a sound strip's waveform within radius frames of a timeline frame"""
+    pyramid = strip_pyramid(strip, build=build)
+    if pyramid is None:
+        return None
+    # clamp the window to the part of the source the strip shows
+    first = max(frame - radius, strip.frame_final_start)
+    last = min(frame + radius, strip.frame_final_end - 1)
+    offset = strip.animation_offset_start - strip.frame_start
+    low, high = pyramid.range_min_max(first + offset, last + offset)
+    return {'min': low, 'max': high, 'peak_db': amplitude_to_db(max(-low, high))}
+
+class WaveformPanel (bpy.types.Panel):
+    bl_label = 'Waveform'
+    bl_idname = 'strip.waveform_panel'
+    bl_space_type = 'SEQUENCE_EDITOR'
+    bl_region_type = 'UI'
+    def draw (self, context):
+        scene = context.scene
+        strip = scene.sequence_editor.active_strip if scene.sequence_editor else None
+        if not strip or strip.type != 'SOUND':
+            self.layout.label(text="Select a sound strip")
+            return
+        self.layout.prop(scene, 'waveform_radius')
+        # never hash or analyse audio while drawing, only look up pyramids already loaded
+        summary = strip_summary(strip, scene.frame_current, scene.waveform_radius, build=False)
+        if summary is None:
+            self.layout.operator('strip.waveform_cache', text="Build Waveform Cache")
+            return
+        self.layout.label(text="Peak: {0:.1f} dB".format(summary['peak_db']))
+        self.layout.label(text="Min {0:.3f}  Max {1:.3f}".format(summary['min'], summary['max']))
+
+class WaveformCacheOperator (bpy.types.Operator):
+    bl_label = 'Build Waveform Cache'
+    bl_idname = 'strip.waveform_cache'
+    bl_description = 'Build waveform pyramids for the selected and active sound strips'
+    def execute (self, context):
+        sequence_editor = context.scene.sequence_editor
+        strips = [strip for strip in sequence_editor.sequences if strip.select and strip.type == 'SOUND']
+        active = sequence_editor.active_strip
+        active and active.type == 'SOUND' and active not in strips and strips.append(active)
+        fps = scene_fps(context.scene)
+        for strip in strips:
+            # reload from the store so edited audio gets a fresh pyramid
+            load_pyramid(sound_path(strip), fps)
+        return {'FINISHED'}
+
+def register():
+    bpy.utils.register_class(WaveformPanel)
+    bpy.utils.register_class(WaveformCacheOperator)
+
+def unregister():
+    bpy.utils.unregister_class(WaveformPanel)
+    bpy.utils.unregister_class(WaveformCacheOperator)
+
+if __name__ == '__main__':
+    register()